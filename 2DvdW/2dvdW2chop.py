@@ -1,55 +1,132 @@
 # Creates and solves CNFs asking for 2-colorings of an HxW rectangle, 
 # with no monochromatic AP longer than length L,
 # that are rotationally symmetric by 180 degrees, but with C columns chopped off of the right side.
-
+#
+# With --sweep (and no C), finds the smallest C that works, on a single incremental solver.
+# Each AP clause is guarded by the selector of the rightmost column it reaches, a variable
+# after the cells' own, so that assuming the selectors of the columns 1 to W-C asks for the
+# chop C. Each coloring found also shows the smallest C it works for, so the sweep goes from
+# there to C-1, until that is unsatisfiable.
+
+import os
+import sys
 from sys import argv
 from pysat.solvers import Glucose4  # Others are available in pysat
+# Shared solver helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from portfolio import Portfolio
+from aps import folded_aps, folded_aps_by_column, coloring_clauses
+from cache import load_formula, save_formula, cache_path
+from budget import Checkpoint
+from options import solver_options, take_flag
+from seed import seed_phases
+
+# The files that the cached APs depend on
+SOURCES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aps.py')]
+
+# A fresh SAT solver for the HxW board with no monochromatic AP longer than L, chopped at C.
+# The portfolio's log names the instance as the arguments would (see SATtools/portfolio.py).
+def new_solver(H, W, L, C):
+    if PORTFOLIO:
+        return Portfolio(f'{H} {W} {L} {C}')
+    return Glucose4()
+
+# The folded APs of length L+1 that miss the chopped columns,
+# from the cache of formulas if they are there (see SATtools/cache.py)
+def cached_aps(H, W, L, C):
+    cached = load_formula(f'2dvdW2chop{C}', H, W, L, 'rot180', SOURCES) if USE_CACHE else None
+    if cached:
+        return cached[0]
+    APs = folded_aps(H, W, L, W - C)
+    if USE_CACHE: save_formula(f'2dvdW2chop{C}', H, W, L, 'rot180', SOURCES, APs)
+    return APs
+
+# The folded APs for every C at once, as pairs (c, ap) with c the rightmost column the AP
+# reaches (see aps.py), from the cache of formulas if they are there. The cache holds [c] + ap.
+def cached_column_aps(H, W, L):
+    cached = load_formula('2dvdW2chops', H, W, L, 'rot180', SOURCES) if USE_CACHE else None
+    if cached:
+        return [(row[0], row[1:]) for row in cached[0]]
+    APs = folded_aps_by_column(H, W, L)
+    if USE_CACHE: save_formula('2dvdW2chops', H, W, L, 'rot180', SOURCES, [[c] + list(ap) for c, ap in APs])
+    return APs
+
+# The selector of column c, numbered after the (H*W + 1)//2 variables of the cells
+def selector(H, W, c):
+    return (H*W + 1)//2 + c
+
+# The two clauses of each AP, each only in force while the selector of its column is true
+def guarded_clauses(H, W, APs):
+    for c, ap in APs:
+        yield [-selector(H, W, c)] + list(ap)
+        yield [-selector(H, W, c)] + [-x for x in ap]
+
+# The smallest C that a coloring works for: it is only the APs past column W - C that may be
+# monochromatic
+def smallest_chop(W, APs, model):
+    positive = set(x for x in model if x > 0)
+    reach = [c for c, ap in APs if all(x in positive for x in ap) or not any(x in positive for x in ap)]
+    return W - min(reach) + 1 if reach else 0
+
+# Find the smallest C for which there is a coloring, on one solver, by assumptions alone.
+# Each coloring found is saved in the checkpoint, and a resumed sweep starts below it.
+# Returns that C and a coloring (the folded variables), or W and None if there is none at all,
+# and whether the sweep finished (not if the budget ran out).
+def sweep_chops(H, W, L, progress, checkpoint):
+    with RUN.phase('aps'):
+        APs = cached_column_aps(H, W, L)
+    with RUN.phase('load'):
+        solver.append_formula(RUN.counted('ap', guarded_clauses(H, W, APs)))
+    if SEED:
+        solver.set_phases(seed_phases(SEED, H, W, lambda i, j: min((i-1)*W + j, H*W + 1 - ((i-1)*W + j))))
+
+    # The free selectors lean towards true, so each coloring tries to work for more columns
+    solver.set_phases([selector(H, W, c) for c in range(1, W+1)])
+
+    C, solution = progress.get('C', W), progress.get('solution')
+    while C > 0:
+        # Ask for C - 1: the APs reaching no further than column W - C + 1
+        if PORTFOLIO:
+            solver.label = f'{H} {W} {L} {C - 1}'
+        with RUN.phase('solve'):
+            answer = BUDGET.solve(solver, [selector(H, W, c) for c in range(1, W - C + 2)])
+        if answer is None:
+            RUN.add_solver(solver)
+            return C, solution, False
+        if not answer:
+            break
+        model = solver.get_model()
+        C, solution = smallest_chop(W, APs, model), model[:(H*W + 1)//2]
+        checkpoint.save({'C': C, 'solution': solution})
+        print("C =", C, "works")
+    RUN.add_solver(solver)
+    return C, solution, True
 
 def try_to_solve(H, W, L, C):
-    # For every starting point (i, j), build APs of length L+1 starting there.
+    # Build every AP of length L+1, each one exactly once (see aps.py)
     # T/F are the two colors of dots
-    APs = []  # Will hold our APs
-    # Each AP is itself a list
     # Variables are numbered:
     # 1 2 3
     # 4 5 6
     # 7 8 9
-    for i in range(1, H+1):
-        for j in range(1, W+1):
-            for dx in range(-((j-1)//(L)), (W-j)//(L) + 1):
-                for dy in range(-((i-1)//(L)), (H-i)//(L) + 1):
-                    if dx == 0 and dy == 0: continue
-                    AP = []
-                    use = True
-                    for t in range(L+1):
-                        point = (i+t*dy, j+t*dx)
-                        if point[1] > W - C: # in a chopped column
-                            use = False
-                            break
-                        idx = (point[0]-1)*W + point[1]
-                        AP.append(min(idx, H*W + 1 - idx))
-                    if use:
-                        APs.append(list(set(AP)))
-
-    # Print the DIMACS cnf formatted problem, and/or create the clauses for the solver
-    # print("p cnf", H*W, 2*len(APs)) # uncomment to print DIMACS header
-    for ap in APs:
-        solver.add_clause(ap)
-        solver.add_clause([-x for x in ap])
-
-        # Uncomment below if you want to print the CNF to stdout
-        """
-        for v in ap:
-            print(v, end=" ")
-        print("0")
-        for v in ap:
-            print(-v, end=" ")
-        print("0")
-        """
-
-    solver.solve()
-    solution = solver.get_model()
-    return solution
+    # Cells idx and H*W+1-idx share the variable min(idx, H*W+1-idx), and duplicate or
+    # subsumed APs are dropped after this folding
+    with RUN.phase('aps'):
+        APs = cached_aps(H, W, L, C)  # Leave out APs that reach the chopped columns
+
+    # Each AP gives two clauses
+    with RUN.phase('load'):
+        solver.append_formula(RUN.counted('ap', coloring_clauses(APs)))
+
+    # Start from the coloring given with --seed, folded as the variables are
+    if SEED:
+        solver.set_phases(seed_phases(SEED, H, W, lambda i, j: min((i-1)*W + j, H*W + 1 - ((i-1)*W + j))))
+
+    # True, False, or None if the budget ran out (see SATtools/budget.py), and the coloring
+    with RUN.phase('solve'):
+        answer = BUDGET.solve(solver)
+    RUN.add_solver(solver)
+    return answer, solver.get_model() if answer else None
 
 # Take dimensions and length, and solution, and produce the file
 def file_from_string(H, W, L, s):
@@ -81,30 +158,65 @@ def print_to_file(H, W, L, C, solution):
 
 if __name__ == "__main__":
 
-    #file_from_string(32, 20, 4, "-1 -2 3 4 5 -6 7 8 -9 10 11 12 13 -14 -15 -16 17 -18 -19 20 -21 -22 23 24 -25 26 -27 -28 -29 -30 31 32 33 -34 35 36 -37 38 39 40 -41 -42 43 -44 -45 -46 47 48 49 50 -51 52 53 -54 55 56 57 58 -59 -60 61 62 63 -64 -65 -66 -67 68 -69 -70 71 -72 -73 -74 -75 76 77 78 -79 80 -81 -82 -83 -84 85 -86 -87 88 -89 -90 -91 92 93 94 95 -96 97 98 -99 100 101 -102 103 104 -105 106 107 108 109 -110 -111 -112 113 -114 -115 116 -117 -118 -119 -120 121 -122 123 124 125 -126 -127 -128 -129 130 -131 -132 133 -134 -135 -136 137 138 139 140 -141 -142 -143 144 145 146 -147 148 149 -150 151 152 153 154 -155 -156 -157 158 -159 -160 161 162 163 -164 165 166 -167 168 169 170 -171 -172 -173 -174 175 -176 -177 178 -179 -180 181 -182 -183 184 -185 -186 -187 -188 189 190 191 -192 193 194 -195 196 197 198 199 -200 201 -202 -203 -204 -205 206 207 208 -209 210 211 -212 213 214 215 -216 -217 -218 -219 220 221 -222 -223 -224 -225 226 -227 -228 229 -230 -231 -232 -233 234 235 236 -237 238 239 -240 -241 -242 243 -244 -245 246 -247 -248 -249 250 251 252 253 -254 255 256 -257 258 259 260 261 262 -263 264 265 266 267 -268 -269 -270 271 -272 -273 274 -275 -276 -277 -278 279 280 281 282 283 -284 -285 -286 -287 288 -289 -290 291 -292 -293 -294 -295 296 297 298 -299 300 301 302 303 304 -305 306 307 -308 309 310 311 -312 -313 -314 -315 316 -317 -318 319 -320 321 -322 323 324 -325 326 327 328 329 -330 -331 -332 333 -334 -335 336 -337 -338 -339 -340 -341 342 -343 -344 -345 346 347 348 349 -350 351 352 -353 354 355 356 357 -358 -359 -360 -361 -362 363 364 365 366 -367 368 369 -370 371 372 373 -374 -375 -376 -377 378 -379 -380 -381 -382 -383 384 -385 -386 387 -388 -389 -390 -391 392 393 394 -395 396 397 -398 399 400 401 -402 -403 404 -405 -406 -407 408 409 410 411 -412 413 414 -415 416 417 418 419 -420 -421 422 423 424 425 -426 -427 -428 429 -430 -431 432 -433 -434 -435 436 437 438 439 -440 441 -442 -443 -444 -445 446 -447 -448 449 -450 -451 -452 453 454 455 456 -457 458 459 -460 461 462 -463 464 465 -466 467 468 469 470 -471 -472 -473 474 -475 -476 477 -478 -479 -480 481 482 -483 484 485 486 -487 -488 -489 -490 491 -492 -493 494 -495 -496 -497 498 499 500 -501 -502 -503 -504 505 506 507 -508 509 510 -511 512 513 514 515 -516 -517 -518 519 -520 521 522 523 524 -525 526 527 -528 529 530 531 -532 -533 -534 -535 536 -537 -538 539 -540 -541 542 -543 -544 545 -546 -547 -548 -549 550 551 552 -553 554 555 -556 557 558 559 560 -561 562 -563 -564 -565 566 567 568 569 -570 571 572 -573 574 575 576 577 -578 -579 -580 581 582 -583 -584 -585 -586 587 -588 -589 590 -591 -592 -593 -594 595 596 597 -598 599 600 -601 -602 -603 604 -605 -606 607 -608 -609 -610 611 612 613 614 -615 616 -617 -618 619 620 -621 622 623 -624 625 626 627 -628 -629 -630 -631 632 -633 -634 635 -636 -637 -638 639 640")
-    #exit(0)
+    # The options shared by the solving programs (see SATtools/options.py): --stats FILE,
+    # --profile DIR, --portfolio, --no-cache, --time S, --conflicts N, --propagations N and
+    # --checkpoint FILE, and --seed FILE, to start the solver from the coloring in FILE, a
+    # 2D-HxW-L.txt file for a nearby board (see seed.py)
+    RUN, PORTFOLIO, USE_CACHE, SEED, BUDGET, CHECKPOINT = solver_options(argv)
 
-    solver = Glucose4()
+    # With --sweep, find the smallest C for the given H, W and L > 0
+    SWEEP = take_flag(argv, '--sweep')
 
     # L is the length of the longest allowed monochromatic AP
-    H, W, L, C = map(int, argv[1:5])
+    H, W, L = map(int, argv[1:4])
+    if SWEEP and L == 0:
+        print("Give a positive L to sweep the chop")
+        exit(1)
+    C = None if SWEEP else int(argv[4])
+    solver = new_solver(H, W, L, C)
 
     # If L = 0, find shortest length with a solution. 
+    # With --sweep, find the smallest C with a solution.
     # Otherwise, try to find a solution with the given L, only
 
-    solution = None
-    if L > 0:
-        solution = try_to_solve(H, W, L, C)
+    # The checkpoint of this run: the smallest L not yet refuted when L = 0, the smallest C
+    # so far with --sweep, and the answer once there is one
+    kind = '2dvdW2chops' if SWEEP else f'2dvdW2chop{C}'
+    checkpoint = Checkpoint(CHECKPOINT, ['2dvdW2chop.py', H, W, L, C,
+                                         os.path.basename(cache_path(kind, H, W, L, 'rot180', SOURCES))])
+    progress = checkpoint.load() or {}
+
+    solution, done = None, True
+    if 'done' in progress:
+        L, C, solution = progress['L'], progress['C'], progress['solution']
+    elif SWEEP:
+        C, solution, done = sweep_chops(H, W, L, progress, checkpoint)
+        if done and solution:
+            print("Smallest C for H =", H, "W =", W, "and L =", L, "is", C)
+    elif L > 0:
+        answer, solution = try_to_solve(H, W, L, C)
+        done = answer is not None
     else:
-        for L in range(2, W + H):
-            solution = try_to_solve(H, W, L, C)
-            if solution:
+        for L in range(progress.get('L', 2), W + H):
+            checkpoint.save({'L': L})  # There is no coloring for smaller L
+            solver = new_solver(H, W, L, C) # a fresh SAT solver for each L
+            answer, solution = try_to_solve(H, W, L, C)
+            if answer is None:
+                done = False
+            if answer is not False:
                 break
-            else:
-                solver = Glucose4() # reset our SAT solver
+    RUN.write('UNKNOWN' if not done else 'SAT' if solution else 'UNSAT', H=H, W=W, L=L, C=C,
+              variables=(H*W + 1)//2)
+    if done:
+        checkpoint.save({'done': True, 'L': L, 'C': C, 'solution': solution})
+    else:
+        print("Unknown" if solution is None else "Unknown, the smallest C so far is")
 
     # Print the board if there is a solution, else "No Solution"
     if solution:
+        # Cells in no AP are missing from the model, and may take either color. Without them
+        # the model would be too short to unfold by reversing it.
+        solution = solution[:(H*W + 1)//2] + [-v for v in range(len(solution) + 1, (H*W + 1)//2 + 1)]
         rsolution = list(reversed(solution))
         if (H*W) % 2 == 1: rsolution = rsolution[1:]
         solution += rsolution
@@ -114,5 +226,5 @@ if __name__ == "__main__":
         colors = ['*' if x > 0 else '-' for x in solution]
         for i in range(H):
             print(" ".join(colors[i*W:(i+1)*W - C]))
-    else:
+    elif done:
         print("No Solution")
\ No newline at end of file
@@ -0,0 +1,114 @@
+# Enumerates the APs of length L+1 on an HxW board, for the 2dvdW programs.
+#
+# Each geometric AP has two step vectors, (dy, dx) and (-dy, -dx). We only use the one with
+# dx > 0, or dx == 0 and dy > 0, so every AP is produced exactly once. For each step vector,
+# the APs are read off L+1 shifted slices of the grid of cell numbers, all at once.
+#
+# Cells are numbered as in 2dvdW.py:
+# 1 2 3
+# 4 5 6
+# 7 8 9
+
+from itertools import combinations
+import numpy as np
+
+
+# The HxW grid of cell numbers
+def cell_grid(H, W):
+    return np.arange(1, H*W + 1, dtype=np.int32).reshape(H, W)
+
+
+# The step vectors (dy, dx) of the APs of length L+1 that fit on an HxW board
+def ap_steps(H, W, L):
+    for dy in range(-((H-1)//L), (H-1)//L + 1):
+        for dx in range((W-1)//L + 1):
+            if dx == 0 and dy <= 0:
+                continue
+            yield dy, dx
+
+
+# For each step vector, an (n, L+1) array whose rows are the APs in the grid
+def ap_blocks(grid, L):
+    H, W = grid.shape
+    for dy, dx in ap_steps(H, W, L):
+        # Start cells (i, j) with i0 <= i < i1 and 0 <= j < j1 keep the whole AP on the board
+        i0, i1 = max(0, -L*dy), min(H, H - L*dy)
+        j1 = W - L*dx
+        yield np.stack([grid[i0 + t*dy : i1 + t*dy, t*dx : j1 + t*dx].ravel() for t in range(L+1)], axis=1)
+
+
+# Every AP of length L+1, as a list of cell numbers, using only the leftmost `cols` columns
+def aps(H, W, L, cols=None):
+    for block in ap_blocks(cell_grid(H, W)[:, :cols], L):
+        yield from block.tolist()
+
+
+# The number of APs that aps(H, W, L, cols) yields, found without listing them
+def count_aps(H, W, L, cols=None):
+    return sum(len(block) for block in ap_blocks(cell_grid(H, W)[:, :cols], L))
+
+
+# The two clauses for each AP, saying that it is not all True and not all False
+def coloring_clauses(APs):
+    for ap in APs:
+        yield list(ap)
+        yield [-x for x in ap]
+
+
+# The symmetry modes of the symmetric colorings (2dvdW2.py), and for each, the images of the
+# grid of cell numbers under all the symmetries the colorings must have, the identity first:
+#   rot180      the 180-degree rotation
+#   rot90       the 90-degree rotations, on square boards only
+#   mirror-lr   the mirror swapping left and right (in the vertical middle line)
+#   mirror-tb   the mirror swapping top and bottom (in the horizontal middle line)
+SYMMETRY_MODES = ['rot180', 'rot90', 'mirror-lr', 'mirror-tb']
+
+def symmetric_images(grid, symmetry):
+    if symmetry == 'rot180':
+        return [grid, grid[::-1, ::-1]]
+    if symmetry == 'rot90':
+        return [np.rot90(grid, k) for k in range(4)]
+    if symmetry == 'mirror-lr':
+        return [grid, grid[:, ::-1]]
+    if symmetry == 'mirror-tb':
+        return [grid, grid[::-1, :]]
+    raise ValueError("Unknown symmetry " + symmetry + " - choose from " + ", ".join(SYMMETRY_MODES))
+
+
+# The HxW grid of variables for colorings with a symmetry: the cells of each orbit always have
+# the same color, and share one variable. The orbits are numbered 1, 2, ... in the order of
+# their first cells, so for rot180 cell idx has the variable min(idx, H*W+1-idx).
+def orbit_vars(H, W, symmetry='rot180'):
+    first = np.minimum.reduce(symmetric_images(cell_grid(H, W), symmetry))
+    _, var = np.unique(first, return_inverse=True)
+    return (var.reshape(H, W) + 1).astype(np.int32)
+
+
+# The APs for colorings with a symmetry, with each cell replaced by its variable (orbit_vars).
+# After folding, many APs give the same set of variables, and some give a set containing
+# another one, whose clause then makes theirs redundant. Both kinds are dropped.
+# Returns a list of sorted tuples of variables.
+def folded_aps(H, W, L, cols=None, symmetry='rot180'):
+    grid = orbit_vars(H, W, symmetry)
+    folded = set()
+    for block in ap_blocks(grid[:, :cols], L):
+        folded.update(tuple(sorted(set(row))) for row in block.tolist())
+    return sorted(ap for ap in folded
+                  if not any(sub in folded for k in range(1, len(ap)) for sub in combinations(ap, k)))
+
+
+# The folded APs for every chop of 2dvdW2chop.py at once: pairs (c, ap), with ap as in
+# folded_aps and c the rightmost column (from 1) reached by an AP that folds to it, the least
+# one if there are several. A set is only dropped when a subset of it is kept with a column no
+# further right, so for each C the pairs with c <= W - C give a formula equivalent to
+# folded_aps(H, W, L, W - C).
+def folded_aps_by_column(H, W, L, symmetry='rot180'):
+    grid = orbit_vars(H, W, symmetry)
+    columns = np.broadcast_to(np.arange(1, W + 1, dtype=np.int32), (H, W))
+    reach = {}
+    for block, cols in zip(ap_blocks(grid, L), ap_blocks(columns, L)):
+        for row, c in zip(block.tolist(), cols.max(axis=1).tolist()):
+            ap = tuple(sorted(set(row)))
+            reach[ap] = min(c, reach.get(ap, c))
+    return sorted((c, ap) for ap, c in reach.items()
+                  if not any(reach.get(sub, c + 1) <= c for k in range(1, len(ap)) for sub in combinations(ap, k)))
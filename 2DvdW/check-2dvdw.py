@@ -1,91 +1,99 @@
-# For each file in the current directory, with name of the for 2D-HxW-L.txt, checks to make sure the 
+# For each file in the current directory, with name of the for 2D-HxW-L.txt, checks to make sure the
 # coloring given in the file has no monochromatic AP of length > L
+#
+# Usage: python3 check-2dvdw.py [FILE ...]
+#   checks the given files instead, if any are named
+#
+# Each board is loaded as a NumPy array. For each step vector (di, dj), the L+1 terms of every
+# AP with that step are L+1 shifted slices of the board, so comparing each slice with the first
+# finds all the monochromatic APs with that step at once. The files are checked in parallel,
+# one per process, and the results are printed in the order of the files.
 
 import glob
+import os
 import re
+from sys import argv
+from multiprocessing import Pool
+import numpy as np
 
-def makes_mono_AP(b, i1, j1, i2, j2, L):
-     H, W = len(b), len(b[0])
-     color = b[i1][j1]
-     di = i2-i1
-     dj = j2-j1
-
-     # See if these starting points make an AP that fits. If not, no AP
-     lasti, lastj = i1 + (L-1)*di, j1 + (L-1)*dj
-     if lasti < 0 or lasti >= H or lastj < 0 or lastj >= W:
-          return False
-     
-     # Now check the AP for monochromaticity
-     for h in range(1, L):
-          i, j = i1 + h * di, j1 + h * dj
-          if b[i][j] != color:
-               return False
-    
-    # If we make it here, it's an AP that fits and it's monochromatic
-     return True
-
-     
-files = glob.glob("2D-*.txt")
-p = re.compile("2D-(\d+)x(\d+)-(\d+).txt")
-                   
-for fname in files:
-    m = p.match(fname)
-    if not m: continue
-
-    print("File:", fname, end=": ")
-    file_is_good = True
+
+# The step vectors (di, dj) of an AP of length n that fits on an HxW board.
+# We step to the right, or straight up, as the brute-force check did, and do not share the
+# step enumeration with the programs that generated the SAT instances.
+def steps(H, W, n):
+    if n < 2:
+        raise ValueError("an AP of length %d has no step; n must be at least 2" % n)
+    for dj in range((W-1)//(n-1) + 1):
+        for di in range(-((H-1)//(n-1)), (H-1)//(n-1) + 1):
+            if dj == 0 and di >= 0: continue
+            yield di, dj
+
+
+# The first monochromatic AP of length n, as (i1, j1, i2, j2), its first two points, taking
+# the first in the order (i1, j1, i2, j2). None if there is no such AP.
+def first_mono_AP(b, n):
+    H, W = b.shape
+    first = None
+    for di, dj in steps(H, W, n):
+        # Starting points (i, j) with i0 <= i < i1 and 0 <= j < j1 keep the whole AP on the board
+        i0, i1 = max(0, -(n-1)*di), min(H, H - (n-1)*di)
+        j1 = W - (n-1)*dj
+        start = b[i0:i1, 0:j1]
+        mono = np.ones(start.shape, dtype=bool)
+        for h in range(1, n):
+            mono &= b[i0 + h*di : i1 + h*di, h*dj : j1 + h*dj] == start
+        hits = np.argwhere(mono)
+        if len(hits):
+            i, j = hits[0]
+            ap = (int(i) + i0, int(j), int(i) + i0 + di, int(j) + dj)
+            if first is None or ap < first:
+                first = ap
+    return first
+
+
+# Check one file, and return the line to print for it
+def check(path):
+    fname = os.path.basename(path)
+    m = re.match(r"2D-(\d+)x(\d+)-(\d+).txt", fname)
 
     # Parameters according to the file name
     fH, fW, fL = int(m.group(1)), int(m.group(2)), int(m.group(3))
 
     # Now open the file and see if it matches the parameters
-    f = open(fname, "r")
-    line = f.readline()
-    H, W, L = tuple(map(int, line.strip().split(" ")))
-    #print("Numbers:", fH, fW, fL, H, W, L)
-    
-    # Check that the file has the right name
-    if (H, W, L) != (fH, fW, fL):
-        print(f'Error: File name does not match internal contents.')
-        file_is_good = False
-        continue
-        #exit(1)
-
-    # Read the board from the file
-    board = []
-    for line in f:
-        row = line.strip().split(" ")
-        if len(row) != W:
-            print("Error: Row has the wrong length.")
-            file_is_good = False
-            break
-            #exit(2)
-        board.append(row)
-    if not file_is_good: continue
+    with open(path, "r") as f:
+        line = f.readline()
+        H, W, L = tuple(map(int, line.strip().split(" ")))
+
+        # Check that the file has the right name
+        if (H, W, L) != (fH, fW, fL):
+            return f'File: {fname}: Error: File name does not match internal contents.'
+
+        # Read the board from the file
+        board = []
+        for line in f:
+            row = line.strip().split(" ")
+            if len(row) != W:
+                return f'File: {fname}: Error: Row has the wrong length.'
+            board.append(row)
 
     if len(board) != H:
-            print("Error: Coloring has too few rows.")
-            file_is_good = False
-            #exit(3)
-    if not file_is_good: continue
+        return f'File: {fname}: Error: Coloring has too few rows.'
+
+    # Every cell is a monochromatic AP of length 1, so L must be at least 1
+    if L < 1:
+        return f'File: {fname}: Error: L must be at least 1.'
 
     # Make sure the board has no monochromatic AP of length greater than L
-    # We make this painfully brute-force, to be different from the way the 
-    # SAT instance creators generated all the APs
-            
-    # For each starting point (i1, j1) and each next point (i2, j2) below or to the right,
-    # Check for an AP starting with those two elements
-    for i1 in range(H):
-         for j1 in range(W):
-              for i2 in range(H):
-                   for j2 in range(j1, W):
-                        if j1 == j2 and i1 <= i2: continue
-                        if not file_is_good: break
-                        #print("isjs", i1, j1, i2, j2)
-                        if makes_mono_AP(board, i1, j1, i2, j2, L+1):
-                             print(f'Error: Long monochromatic AP found starting at ({i1}, {j1})-({i2}, {j2})')
-                             file_is_good = False
-                             #exit(4)
-    if file_is_good:
-        print("Good")
-              
\ No newline at end of file
+    ap = first_mono_AP(np.array(board), L+1)
+    if ap:
+        i1, j1, i2, j2 = ap
+        return f'File: {fname}: Error: Long monochromatic AP found starting at ({i1}, {j1})-({i2}, {j2})'
+    return f'File: {fname}: Good'
+
+
+if __name__ == "__main__":
+    files = argv[1:] or glob.glob("2D-*.txt")
+    files = [f for f in files if re.match(r"2D-(\d+)x(\d+)-(\d+).txt", os.path.basename(f))]
+    with Pool() as pool:
+        for result in pool.imap(check, files):
+            print(result)
@@ -0,0 +1,70 @@
+# Counts the 2-colorings of an HxW rectangle with no monochromatic AP longer than L, both all
+# of them and up to the symmetries of the rectangle and the swap of the two colors (see
+# symmetry.py for the symmetries).
+#
+# Usage: python3 count_colorings.py 4 8 2
+# Options:
+#   --out FILE     write each orbit as a line "size coloring" to FILE as it is found, with its
+#                  least coloring, row by row, * and - (names ending in .gz or .xz are compressed)
+#   --split K      split the work into 2^K cubes by the colors of K cells across the middle row
+#   --workers N    solve N cubes at a time, in parallel (default 1)
+#
+# See SATtools/enumeration.py. Cells are numbered as in 2dvdW.py, and a coloring is the set of
+# its cells colored *.
+
+import os
+import sys
+from itertools import product
+from sys import argv
+# Shared solver helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from enumeration import enumerate_orbits
+# and the output files in ../SATgenerators
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATgenerators'))
+from dimacs import open_output
+from aps import aps, coloring_clauses
+from symmetry import board_symmetries
+
+
+# For each symmetry of the board, with and without the color swap, and for the swap alone,
+# the map of colorings it gives
+def coloring_symmetries(H, W):
+    cells = frozenset(range(1, H*W + 1))
+    perms = [None]  # The identity, for the swap alone
+    for sym in board_symmetries(H, W):
+        perms.append({(i-1)*W + j: (sym(i, j)[0]-1)*W + sym(i, j)[1]
+                      for i in range(1, H+1) for j in range(1, W+1)})
+    maps = []
+    for perm in perms:
+        if perm:
+            maps.append(lambda solution, perm=perm: frozenset(perm[v] for v in solution))
+        maps.append(lambda solution, perm=perm: cells - frozenset(perm[v] for v in solution) if perm else cells - solution)
+    return maps
+
+
+if __name__ == "__main__":
+    options = {'--out': None, '--split': 0, '--workers': 1}
+    for name in options:
+        if name in argv:
+            k = argv.index(name)
+            options[name] = argv[k+1] if name == '--out' else int(argv[k+1])
+            del argv[k:k+2]
+    H, W, L = map(int, argv[1:4])
+
+    formula = list(coloring_clauses(aps(H, W, L)))
+    K = options['--split']
+    chosen = [(H//2)*W + (k+1)*W//(K+1) + 1 for k in range(K)]  # K cells across the middle row
+    cubes = [[s * v for s, v in zip(signs, chosen)] for signs in product([1, -1], repeat=K)]
+
+    out = open_output(options['--out']) if options['--out'] else None
+    def on_orbit(solution, size):
+        if out:
+            out.write(b"%d %s\n" % (size, "".join('*' if v in solution else '-' for v in range(1, H*W + 1)).encode()))
+    block = lambda solution: [-v if v in solution else v for v in range(1, H*W + 1)]
+    orbits, colorings = enumerate_orbits(formula, H*W, coloring_symmetries(H, W), block, on_orbit,
+                                         cubes, options['--workers'], verbose=len(cubes) > 1)
+    if out:
+        out.close()
+    print(H, W, L)
+    print("Colorings:", colorings)
+    print("Up to symmetry:", orbits)
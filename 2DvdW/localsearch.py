@@ -0,0 +1,165 @@
+# Searches for a 2-coloring of an HxW rectangle with no monochromatic AP longer than L by local
+# search (probSAT), working on the coloring itself rather than on a CNF. On long thin boards it
+# can find colorings sooner than a CDCL solver, but it can never show that there is none: if it
+# runs out of time, 2dvdW.py is run to settle the question.
+#
+# Usage: python3 localsearch.py 4 100 4
+#   searches for 60 seconds, then falls back to 2dvdW.py
+# Options:
+#   --time S       seconds to search (default 60)
+#   --workers N    searches run in parallel, with seeds K, K+1, ..., K+N-1 (default 1)
+#   --seed K       the first seed (default 0)
+#   --flips F      flips before restarting from a new random coloring, at least 1 (default 1000000)
+#   --no-fallback  do not run 2dvdW.py when no coloring is found, and print Unknown
+#
+# A coloring found is printed and saved as 2D-HxW-L.txt, as 2dvdW.py does, with L the length of
+# its longest monochromatic AP (see longest.py).
+#
+# The APs of length L+1 are a fixed (n, L+1) array of cells (see aps.py), and each cell has the
+# array of the APs it is in. The search keeps the number of cells of color 1 in every AP, so an
+# AP is monochromatic when that number is 0 or L+1, the list of the monochromatic APs, and for
+# each cell its break, the number of APs its flip would make monochromatic. A flip only updates
+# these for the APs of the flipped cell. Each step picks a monochromatic AP at random and flips
+# one of its cells, chosen with probability (1 + break)^-CB. CB is the value Balint and Schoning
+# found best for clauses of length L+1.
+
+import os
+import subprocess
+import sys
+import time
+from sys import argv
+from multiprocessing import Pool
+import numpy as np
+from aps import ap_blocks, cell_grid
+from longest import longest_mono_AP
+# Shared option helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from options import take_flag, take_value
+
+CB = {3: 2.06, 4: 3.0, 5: 3.7, 6: 5.1, 7: 5.4}  # By the length of the APs, L+1
+
+
+# The APs of length L+1 as an (n, L+1) array of cells numbered from 0, and for each cell the
+# array of the APs it is in
+def ap_index(H, W, L):
+    blocks = [block - 1 for block in ap_blocks(cell_grid(H, W), L)]
+    if not blocks:
+        return np.zeros((0, L+1), dtype=np.int64), [np.zeros(0, dtype=np.int64)] * (H*W)
+    APs = np.concatenate(blocks)
+    flat = APs.ravel()
+    order = np.argsort(flat, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(flat, minlength=H*W))])
+    members = [order[bounds[c]:bounds[c+1]] // (L+1) for c in range(H*W)]
+    return APs, members
+
+
+# The cells of the APs A, with ones[k] cells of color 1 in A[k], whose flip would make their AP
+# monochromatic: the one cell of color 1 when ones is 1, the one of color 0 when ones is L
+def critical(A, ones, colors, L):
+    return A[np.where(colors[A] == 1, (ones == 1)[:, None], (ones == L)[:, None])]
+
+
+# Search with the given seed until time runs out.
+# Returns (seed, coloring, flips), the coloring an HxW array of 0s and 1s, or None if none was found.
+def search(H, W, L, seed, seconds, flips):
+    deadline = time.time() + seconds
+    rng = np.random.default_rng(seed)
+    APs, members = ap_index(H, W, L)
+    if len(APs) == 0:
+        # No AP of length L+1 fits on the board, so every coloring will do
+        return seed, rng.integers(0, 2, (H, W)).astype(np.int32), 0
+    weight = (1.0 + np.arange(max(len(m) for m in members) + 1)) ** -CB.get(L+1, 0.8*(L+1))
+    total = 0
+    while time.time() < deadline:
+        colors = rng.integers(0, 2, H*W).astype(np.int32)
+        ones = colors[APs].sum(axis=1)
+        # The monochromatic APs are bad[:nbad], and AP a is at bad[where[a]], or where[a] is -1
+        bad = np.zeros(len(APs), dtype=np.int64)
+        found = np.flatnonzero((ones == 0) | (ones == L+1))
+        nbad = len(found)
+        bad[:nbad] = found
+        where = np.full(len(APs), -1, dtype=np.int64)
+        where[found] = np.arange(nbad)
+        # breaks[c] is the number of APs that flipping c would make monochromatic
+        breaks = np.bincount(critical(APs, ones, colors, L), minlength=H*W)
+        # Flip until no AP is monochromatic, for at most flips flips
+        done = 0
+        while nbad > 0 and done < flips:
+            if done % 1024 == 0:
+                if time.time() > deadline:
+                    break
+                rand = rng.random((1024, 2))
+            r = rand[done % 1024]
+            cells = APs[bad[int(r[0] * nbad)]]
+            p = np.cumsum(weight[breaks[cells]])
+            c = cells[np.searchsorted(p, r[1] * p[-1])]
+            # Only the APs of c change: take their critical cells out, flip, and put the new ones in
+            m = members[c]
+            A = APs[m]
+            np.subtract.at(breaks, critical(A, ones[m], colors, L), 1)
+            colors[c] ^= 1
+            ones[m] += 2*colors[c] - 1
+            np.add.at(breaks, critical(A, ones[m], colors, L), 1)
+            for a in m[((ones[m] == 0) | (ones[m] == L+1)) != (where[m] >= 0)].tolist():
+                if where[a] < 0:
+                    bad[nbad], where[a] = a, nbad
+                    nbad += 1
+                else:
+                    nbad -= 1
+                    last = bad[nbad]
+                    bad[where[a]], where[last] = last, where[a]
+                    where[a] = -1
+            done += 1
+        total += done
+        if nbad == 0:
+            return seed, colors.reshape(H, W), total
+    return seed, None, total
+
+
+def search_task(args):
+    return search(*args)
+
+
+# Take dimensions and a coloring, and print it to a file with name 2D-HxW-L.txt
+def print_to_file(H, W, L, board):
+    with open(f'2D-{H}x{W}-{L}.txt', 'w') as file:
+        file.write(f'{H} {W} {L}\n')
+        for row in board:
+            file.write(" ".join('*' if x else '-' for x in row))
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    SECONDS = float(take_value(argv, '--time', 60))
+    WORKERS = int(take_value(argv, '--workers', 1))
+    SEED = int(take_value(argv, '--seed', 0))
+    FLIPS = int(take_value(argv, '--flips', 1000000))
+    FALLBACK = not take_flag(argv, '--no-fallback')
+    if FLIPS < 1:
+        print("Give at least 1 flip before each restart")
+        exit(1)
+    H, W, L = map(int, argv[1:4])
+
+    start = time.time()
+    jobs = [(H, W, L, SEED + k, SECONDS, FLIPS) for k in range(WORKERS)]
+    board = None
+    with Pool(len(jobs)) as pool:
+        for seed, board, flips in pool.imap_unordered(search_task, jobs):
+            if board is not None:
+                print(f'Found by seed {seed} after {flips} flips, {time.time() - start:.1f} seconds')
+                break
+        pool.terminate()
+
+    if board is not None:
+        L = longest_mono_AP(board)
+        print(H, W, L)
+        print_to_file(H, W, L, board)
+        for row in board:
+            print(" ".join('*' if x else '-' for x in row))
+    elif FALLBACK:
+        print("No coloring found by local search, trying SAT")
+        here = os.path.dirname(os.path.abspath(__file__))
+        exit(subprocess.call([sys.executable, os.path.join(here, '2dvdW.py'), str(H), str(W), str(L)]))
+    else:
+        # Local search cannot show that there is no coloring
+        print("Unknown")
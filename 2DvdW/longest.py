@@ -0,0 +1,90 @@
+# Finds the length of the longest monochromatic AP in a coloring, exactly, rather than only
+# whether there is one longer than L.
+#
+# Usage: python3 longest.py [FILE ...]
+#   prints the longest monochromatic AP of each 2D-HxW-L.txt coloring in the current directory
+#   (or of the files named)
+# Usage: python3 longest.py --rename [FILE ...]
+#   also renames each file whose longest AP is shorter than its L to 2D-HxW-L.txt with the true L,
+#   and fixes the L in its first line
+#
+# For each step vector (dy, dx), run[p] is the length of the longest monochromatic AP with that
+# step ending at cell p: run[p] = run[p - step] + 1 if p and p - step have the same color, else 1.
+# The whole board is updated at once, and this is repeated until nothing changes, which takes as
+# many rounds as the longest AP with that step is long. A step is only tried if an AP longer
+# than the longest found so far fits on the board with it.
+
+import glob
+import os
+import re
+from sys import argv
+import numpy as np
+
+
+# The length of the longest monochromatic AP in the HxW array of colors b
+def longest_mono_AP(b):
+    H, W = b.shape
+    best = 1 if b.size else 0
+    for dx in range(W):
+        for dy in range(-(H-1), H):
+            if dx == 0 and dy <= 0: continue
+            if best * abs(dy) > H-1 or best * dx > W-1: continue
+            best = max(best, longest_run(b, dy, dx))
+    return best
+
+
+# The longest monochromatic AP with step (dy, dx), by the DP above
+def longest_run(b, dy, dx):
+    H, W = b.shape
+    # Cells p whose p - step is on the board, and the cells p - step
+    to = (slice(max(0, dy), H + min(0, dy)), slice(dx, W))
+    frm = (slice(max(0, -dy), H - max(0, dy)), slice(0, W - dx))
+    same = b[to] == b[frm]
+    run = np.ones(b.shape, dtype=np.int32)
+    while True:
+        new = np.where(same, run[frm] + 1, 1)
+        if (new == run[to]).all():
+            return int(run.max())
+        run[to] = new
+
+
+# The colors of a solution of the 2dvdW programs (cells numbered row by row), as an HxW array
+def solution_board(H, W, solution):
+    return np.array(solution[:H*W]).reshape(H, W) > 0
+
+
+# H, W, L and the board of a 2D-HxW-L.txt file
+def read_coloring(path):
+    with open(path) as f:
+        H, W, L = map(int, f.readline().split())
+        board = np.array([line.split() for line in f if line.strip()])
+    return H, W, L, board
+
+
+# Print the longest AP of a file, and rename it to its true L if asked to.
+# A file of that name that is already there is left alone.
+def report(path, rename):
+    H, W, L, board = read_coloring(path)
+    longest = longest_mono_AP(board)
+    print(f'{os.path.basename(path)}: longest monochromatic AP has length {longest}')
+    if rename and longest < L:
+        target = os.path.join(os.path.dirname(path), f'2D-{H}x{W}-{longest}.txt')
+        if os.path.exists(target):
+            print(f'  {os.path.basename(target)} is already there, not renamed')
+            return
+        with open(path) as f:
+            lines = f.readlines()
+        lines[0] = f'{H} {W} {longest}\n'
+        with open(target, 'w') as f:
+            f.writelines(lines)
+        os.remove(path)
+        print(f'  renamed to {os.path.basename(target)}')
+
+
+if __name__ == "__main__":
+    rename = '--rename' in argv
+    if rename: argv.remove('--rename')
+    files = argv[1:] or sorted(glob.glob("2D-*.txt"))
+    for path in files:
+        if re.match(r"2D-(\d+)x(\d+)-(\d+).txt", os.path.basename(path)):
+            report(path, rename)
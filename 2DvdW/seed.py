@@ -0,0 +1,24 @@
+# Warm starts for the 2dvdW programs (--seed FILE): a coloring found earlier, such as
+# 2D-16x45-4.txt, is laid on the new board, cropped to it if it is larger, and given to the
+# solver as the initial phase of each cell's variable (solver.set_phases). Cells it does not
+# reach keep the solver's own phase. For nearby instances, one column wider or with L one
+# smaller, most of the old coloring usually survives, and the solver starts close to it.
+
+from longest import read_coloring
+
+
+# The phases, as literals, that put the coloring in path on the HxW board. var(i, j) is the
+# variable of cell (i, j), counting from 1. A coloring of a board of the other orientation
+# (taller where the new one is wider) is transposed first. Where several cells share a
+# variable, as in the symmetric programs, the first one read decides its phase.
+def seed_phases(path, H, W, var):
+    _, _, _, board = read_coloring(path)
+    if (board.shape[0] > board.shape[1]) != (H > W) and board.shape[0] != board.shape[1]:
+        board = board.T
+    phases = {}
+    for i in range(min(H, board.shape[0])):
+        for j in range(min(W, board.shape[1])):
+            v = var(i+1, j+1)
+            if v not in phases:
+                phases[v] = v if board[i, j] == '*' else -v
+    return list(phases.values())
@@ -0,0 +1,65 @@
+# Symmetry-breaking clauses for 2-colorings of an HxW rectangle.
+#
+# If a coloring has no long monochromatic AP, then neither does its image under any reflection
+# or rotation that maps the rectangle to itself, nor the coloring with the two colors swapped.
+# So we may ask only for the coloring that comes first, in lexicographic order, among all these
+# images ("lex-leader"). Some coloring in every orbit is the lex-leader, so the formula stays
+# satisfiable exactly when it was before, but the solver no longer has to refute each of the
+# up to 16 symmetric copies of a partial coloring separately.
+#
+# Cells are numbered as in 2dvdW.py, (i-1)*W + j, and the lexicographic order is the order of
+# those numbers, with False < True. For the color swap alone, the lex-leader condition just
+# says that cell 1 is False, which fixes the color of the top-left cell.
+
+# The maps (i, j) -> (i', j') of the rectangle onto itself, other than the identity, 1-based
+def board_symmetries(H, W):
+    syms = [
+        lambda i, j: (i, W+1-j),             # Mirror left-right
+        lambda i, j: (H+1-i, j),             # Mirror top-bottom
+        lambda i, j: (H+1-i, W+1-j),         # Rotate 180 degrees
+    ]
+    if H == W:
+        syms += [
+            lambda i, j: (j, i),             # Mirror in the main diagonal
+            lambda i, j: (W+1-j, H+1-i),     # Mirror in the other diagonal
+            lambda i, j: (j, H+1-i),         # Rotate 90 degrees
+            lambda i, j: (W+1-j, i),         # Rotate 270 degrees
+        ]
+    return syms
+
+
+# Clauses saying x <= y lexicographically, where x is the list of variables 1, 2, ..., n and
+# y is a list of literals over the same variables. New variables start at next_var.
+# Returns the clauses and the next unused variable.
+def lex_leq(y, next_var):
+    clauses = []
+    equal = None  # Literal that is true when x and y agree on every position so far
+    for v, lit in enumerate(y, start=1):
+        if lit == v:
+            continue  # x_v <= x_v always, and they are always equal
+        guard = [] if equal is None else [-equal]
+        clauses.append(guard + [-v, lit])  # If equal so far, then x_v <= y_v
+        if lit == -v:
+            break  # x_v <= -x_v forces x_v False, and then x and y differ here
+        # If equal so far, and x_v == y_v, then still equal
+        clauses.append(guard + [-v, next_var])
+        clauses.append(guard + [lit, next_var])
+        equal = next_var
+        next_var += 1
+    return clauses, next_var
+
+
+# All the lex-leader clauses for the HxW board, using new variables from H*W + 1 on
+def symmetry_breaking_clauses(H, W):
+    clauses = [[-1]]  # The color swap alone: cell 1 is False
+    next_var = H*W + 1
+    for sym in board_symmetries(H, W):
+        image = []
+        for i in range(1, H+1):
+            for j in range(1, W+1):
+                si, sj = sym(i, j)
+                image.append((si-1)*W + sj)
+        for swap in [1, -1]:  # The symmetry alone, and combined with the color swap
+            more, next_var = lex_leq([swap * v for v in image], next_var)
+            clauses += more
+    return clauses
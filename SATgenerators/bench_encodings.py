@@ -0,0 +1,62 @@
+# Compares the at-most-one encodings of the ONCE constraints (see clauses.py) on the three
+# classes of tiling formulas: plain (build_and_solve_SAT.py), 180-degree symmetric
+# (build_and_solve_SAT2.py, d and r Ts) and 90-degree symmetric (build_and_solve_SAT4.py,
+# d Ts on squares). In the symmetric classes each variable stands for a T and its rotated
+# copies. Thanks to Walkup's residues, no square is covered by more than 4 variables in any
+# class, so the pairwise encoding needs at most 6 clauses per square and no new variables.
+# The other encodings only pay off for long at-most-one constraints, so on every board we have
+# tried they add variables and clauses and buy nothing: pairwise is the default, and the others
+# are kept for new classes of formulas, where this is worth checking again.
+#
+# For each instance and encoding it prints the number of variables and clauses, the time to
+# generate the formula, and the time for pysat to solve it.
+#
+# Usage: python3 bench_encodings.py
+#   runs a default set of instances
+# Usage: python3 bench_encodings.py rot180 24 24 3 [plain 16 16 2 ...] [--solver cadical153]
+#   runs the given instances, each a class (plain, rot180 or rot90) and H W L
+
+import os
+import sys
+import time
+from sys import argv
+from pysat.solvers import Solver
+from clauses import tiling_clauses, AMO_ENCODINGS
+from geometry import Board
+# Shared option helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from options import take_value
+
+DEFAULT = [('plain', 24, 24, 2), ('plain', 40, 40, 3),
+           ('rot180', 28, 28, 2), ('rot180', 40, 60, 3),
+           ('rot90', 32, 32, 2), ('rot90', 48, 48, 3)]
+
+# For each class: the directions of its Ts, and the symmetry mode of its board (see geometry.py)
+CLASSES = {
+    'plain': (['u', 'd', 'l', 'r'], 'none'),
+    'rot180': (['d', 'r'], 'rot180'),
+    'rot90': (['d'], 'rot90'),
+}
+
+
+def bench(kind, H, W, L, encoding, solver_name):
+    start = time.time()
+    board = Board(H, W, *CLASSES[kind])
+    formula = list(tiling_clauses(board, L, encoding))
+    generated = time.time() - start
+    numvars = max(abs(x) for clause in formula for x in clause)
+    start = time.time()
+    with Solver(name=solver_name, bootstrap_with=formula) as solver:
+        answer = solver.solve()
+    solved = time.time() - start
+    print("%-7s %4d %4d %2d  %-10s %8d %9d %8.2fs %8.2fs  %s" %
+          (kind, H, W, L, encoding, numvars, len(formula), generated, solved, "SAT" if answer else "UNSAT"))
+
+
+if __name__ == "__main__":
+    solver_name = take_value(argv, '--solver', 'glucose4')
+    instances = [(argv[k], int(argv[k+1]), int(argv[k+2]), int(argv[k+3])) for k in range(1, len(argv), 4)]
+    print("class      H    W  L  encoding       vars   clauses  generate     solve")
+    for kind, H, W, L in instances or DEFAULT:
+        for encoding in AMO_ENCODINGS:
+            bench(kind, H, W, L, encoding, solver_name)
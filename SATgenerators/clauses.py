@@ -0,0 +1,140 @@
+# The clause families of the tiling formulas, as generators.
+#
+# Each family yields its clauses one at a time, so a formula can go straight into a solver
+# (solver.append_formula) or a DIMACS stream (dimacs.DIMACSStream), without ever being held
+# in full. tiling_store collects them in a ClauseStore instead, for the cache.
+# The board is a geometry.Board. The symmetric programs use the same generators: there, the
+# Ts covering a square are those whose symmetric copies (together with the T itself) cover it.
+#
+# COVER: each square is covered by some T
+# ONCE: no two Ts covering the same square are both used. This is an at-most-one constraint,
+#   which can be encoded in several ways (AMO_ENCODINGS); all but the pairwise one add variables.
+# NOAP: there is no AP of more than L Ts of the same direction (see noap.py)
+
+from itertools import combinations
+from pysat.card import CardEnc, EncType
+import numpy as np
+from noap import noap_blocks, noap_clauses, count_noap_clauses
+from clausestore import ClauseStore
+
+
+def cover_clauses(board):
+    yield from board.by_square()
+
+
+# At most one of lits is true, as (clauses, top): the clauses, and the last variable used.
+# Encodings that need new variables number them from top + 1.
+
+# Every pair of lits is not both true. No new variables, but n(n-1)/2 clauses.
+def amo_pairwise(lits, top):
+    return [[-a, -b] for a, b in combinations(lits, 2)], top
+
+
+# Sinz's sequential counter: the new variable s[k] says that one of lits[0..k] is true.
+# n-1 new variables and 3n-4 clauses.
+def amo_seqcounter(lits, top):
+    n = len(lits)
+    if n <= 1:
+        return [], top
+    s = list(range(top + 1, top + n))
+    clauses = [[-lits[0], s[0]]]
+    for k in range(1, n-1):
+        clauses += [[-lits[k], s[k]], [-s[k-1], s[k]], [-lits[k], -s[k-1]]]
+    clauses.append([-lits[n-1], -s[n-2]])
+    return clauses, top + n - 1
+
+
+# Klieber and Kwon's commander encoding: split lits into groups of 3, each with a new
+# "commander" variable that is true exactly when one of its group is. At most one in each
+# group (pairwise), and at most one commander, by the same encoding again.
+def amo_commander(lits, top, group=3):
+    if len(lits) <= group:
+        return amo_pairwise(lits, top)
+    clauses, commanders = [], []
+    for g in range(0, len(lits), group):
+        members = lits[g:g+group]
+        top += 1
+        commanders.append(top)
+        clauses += amo_pairwise(members, top)[0]
+        clauses += [[-x, top] for x in members]  # A member implies its commander
+        clauses.append([-top] + members)  # and the commander implies a member
+    more, top = amo_commander(commanders, top, group)
+    return clauses + more, top
+
+
+# pysat's CardEnc, with the ladder (regular) encoding: n-1 new variables
+def amo_cardenc(lits, top):
+    enc = CardEnc.atmost(lits, bound=1, top_id=top, encoding=EncType.ladder)
+    return enc.clauses, max(top, enc.nv)
+
+
+AMO_ENCODINGS = {
+    'pairwise': amo_pairwise,
+    'seqcounter': amo_seqcounter,
+    'commander': amo_commander,
+    'cardenc': amo_cardenc,
+}
+
+
+# For each square, the ONCE clauses of the Ts covering it, and the last variable used so far.
+# New variables come after the Ts, from len(board) + 1 on.
+def once_by_square(board, encoding):
+    amo = AMO_ENCODINGS[encoding]
+    top = len(board)
+    for lits in board.by_square(): # loop over the squares
+        clauses, top = amo(lits, top)
+        yield clauses, top
+
+
+# With COVER, ONCE says that each square is covered exactly once
+def once_clauses(board, encoding='pairwise'):
+    for clauses, _ in once_by_square(board, encoding):
+        yield from clauses
+
+
+# The whole formula: COVER, ONCE, then NOAP for the Ts of the board's directions (none if L = 0)
+def tiling_clauses(board, L, encoding='pairwise'):
+    yield from cover_clauses(board)
+    yield from once_clauses(board, encoding)
+    if L > 0:
+        yield from noap_clauses(board.grids(), L)
+
+
+# Pass the formula tiling_clauses yields to solver.append_formula (a pysat solver, or a writer
+# from dimacs.py), generating it only once. Returns the number of variables, Ts and the new ones
+# of ONCE together, and the number of clauses of each family, counted on the way.
+def add_tiling_clauses(solver, board, L, encoding='pairwise'):
+    sizes = {}
+    solver.append_formula(counted(sizes, 'cover', cover_clauses(board)))
+    top, sizes['once'] = len(board), 0
+    for clauses, top in once_by_square(board, encoding):
+        solver.append_formula(clauses)
+        sizes['once'] += len(clauses)
+    solver.append_formula(counted(sizes, 'noap', noap_clauses(board.grids(), L) if L > 0 else []))
+    return top, sizes
+
+
+# The clauses, counted in sizes[family] as they go by
+def counted(sizes, family, clauses):
+    sizes[family] = 0
+    for clause in clauses:
+        sizes[family] += 1
+        yield clause
+
+
+# The number of clauses of each family in a formula of numclauses clauses in all, as
+# tiling_clauses yields them: one COVER clause per square, and the NOAP clauses of the grids
+def family_sizes(H, W, L, grids, numclauses):
+    noap = count_noap_clauses(grids, L) if L > 0 else 0
+    return {'cover': H*W, 'once': numclauses - H*W - noap, 'noap': noap}
+
+
+# The same formula, held in a ClauseStore. The NOAP clauses go in as whole arrays.
+def tiling_store(board, L, encoding='pairwise'):
+    formula = ClauseStore()
+    formula.append_formula(cover_clauses(board))
+    formula.append_formula(once_clauses(board, encoding))
+    if L > 0:
+        for block in noap_blocks(board.grids(), L):
+            formula.add_block(block)
+    return formula
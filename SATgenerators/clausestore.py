@@ -0,0 +1,127 @@
+# A formula held in two flat integer arrays, rather than as a list of small Python lists.
+#
+# lits holds all the literals, one clause after another (int32), and offsets says where each
+# clause starts (int64): clause k is lits[offsets[k]:offsets[k+1]]. A Python list of clauses
+# costs about 100 bytes per clause plus 28 per literal; here it is 8 per clause and 4 per literal.
+#
+# Clauses come in as blocks: a 2D array whose rows are clauses of the same length (as the
+# NOAP clauses come out of noap.ap_blocks), or a list of clauses. The blocks are joined into
+# the two arrays once, when they are first needed.
+#
+# The formula is handed to a pysat solver in chunks of clauses, so only one chunk at a time
+# exists as Python lists, and can be written out as DIMACS the same way. pysat takes each clause
+# as a Python iterable, so the lists cannot be skipped, but they are made fast: each run of
+# clauses of the same length becomes lists in one numpy call (reshape, then tolist), and the
+# cycle collector, which would otherwise scan the new lists again and again, is paused while
+# the solver is loaded. Lists of ints cannot form cycles, so it has nothing to find there.
+# Loading the 100x100 L = 3 formula (730944 clauses) into Glucose 4 takes 1.2-1.6 s this way,
+# against 2.4 s when the clauses were sliced one at a time out of a flat list.
+
+import gc
+import sys
+import numpy as np
+from dimacs import open_output
+
+CHUNK = 1 << 16  # Clauses converted to Python lists (or to text) at a time
+
+
+class ClauseStore:
+    def __init__(self, lits=None, offsets=None):
+        self.blocks = []  # (literals, clause lengths) pairs, not yet joined
+        self.pending = []  # Clauses from add_clause, not yet made into a block
+        self.lits = np.zeros(0, dtype=np.int32) if lits is None else lits
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else offsets
+
+    def add_clause(self, clause):
+        self.pending.append(clause)
+        if len(self.pending) >= CHUNK:
+            self.flush()
+
+    # Make the clauses from add_clause into a block, so that they keep their place in the order
+    def flush(self):
+        pending, self.pending = self.pending, []
+        if pending:
+            self.add_clauses(pending)
+
+    # Any iterable of clauses, such as the generators in clauses.py
+    def append_formula(self, clauses):
+        for clause in clauses:
+            self.add_clause(clause)
+
+    # A list of clauses, of any lengths
+    def add_clauses(self, clauses):
+        self.flush()
+        lengths = np.fromiter((len(c) for c in clauses), dtype=np.int64, count=len(clauses))
+        lits = np.fromiter((x for c in clauses for x in c), dtype=np.int32, count=int(lengths.sum()))
+        self.blocks.append((lits, lengths))
+
+    # A 2D array, each row of which is a clause
+    def add_block(self, block):
+        self.flush()
+        n, k = block.shape
+        self.blocks.append((block.astype(np.int32).ravel(), np.full(n, k, dtype=np.int64)))
+
+    # Join everything added so far onto the arrays lits and offsets, and return them
+    def arrays(self):
+        self.flush()
+        if self.blocks:
+            lengths = np.concatenate([l for _, l in self.blocks])
+            ends = self.offsets[-1] + np.cumsum(lengths)
+            self.lits = np.concatenate([self.lits] + [b for b, _ in self.blocks])
+            self.offsets = np.concatenate([self.offsets, ends])
+            self.blocks = []
+        return self.lits, self.offsets
+
+    def __len__(self):
+        return len(self.arrays()[1]) - 1
+
+    def numvars(self):
+        lits = self.arrays()[0]
+        return int(np.abs(lits).max()) if len(lits) else 0
+
+    # The clauses k with start <= k < end, as Python lists, made a run of clauses of the same length at a time
+    def clauses(self, start=0, end=None):
+        lits, offsets = self.arrays()
+        end = len(offsets) - 1 if end is None else end
+        if end <= start:
+            return []
+        lengths = np.diff(offsets[start:end+1])
+        cuts = (np.flatnonzero(np.diff(lengths)) + 1).tolist()
+        if len(cuts) > (end - start) // 8:
+            # Runs too short to be worth a numpy call each: slice the clauses out of one list
+            flat = lits[offsets[start]:offsets[end]].tolist()
+            bounds = (offsets[start:end+1] - offsets[start]).tolist()
+            return [flat[x:y] for x, y in zip(bounds, bounds[1:])]
+        clauses = []
+        for a, b in zip([0] + cuts, cuts + [end - start]):
+            run = lits[offsets[start+a]:offsets[start+b]]
+            clauses += run.reshape(b - a, int(lengths[a])).tolist()
+        return clauses
+
+    # The clauses, CHUNK at a time
+    def chunks(self):
+        for start in range(0, len(self), CHUNK):
+            yield self.clauses(start, min(len(self), start + CHUNK))
+
+    # Add every clause to a pysat solver (or anything else with append_formula)
+    def load_into(self, solver):
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for chunk in self.chunks():
+                solver.append_formula(chunk)
+        finally:
+            if collecting:
+                gc.enable()
+
+    # Write the formula in DIMACS format to path (stdout if None or '-', compressed for .gz or .xz)
+    def write_dimacs(self, path, numvars=None):
+        out = open_output(path)
+        numvars = self.numvars() if numvars is None else numvars
+        out.write(("p cnf %d %d\n" % (numvars, len(self))).encode())
+        for chunk in self.chunks():
+            out.write("".join(" ".join(map(str, c)) + " 0\n" for c in chunk).encode())
+        if out is sys.stdout.buffer:
+            out.flush()
+        else:
+            out.close()
@@ -0,0 +1,81 @@
+# Counts the tilings of an HxW rectangle with no AP of same-direction Ts longer than L, both all
+# of them and up to the symmetries of the rectangle (the mirrors and the 180-degree rotation, and
+# on squares also the diagonal mirrors and the 90-degree rotations). With L = 0 there is no AP
+# condition, and all the tilings are counted.
+#
+# Usage: python3 count_tilings.py 8 8 2
+# Options:
+#   --out FILE     write each orbit as a line "size tiling-string" to FILE as it is found,
+#                  with its least tiling (names ending in .gz or .xz are compressed)
+#   --split K      split the work into cubes by the Ts covering K squares across the middle row
+#   --workers N    solve N cubes at a time, in parallel (default 1)
+#
+# See SATtools/enumeration.py. A tiling is blocked by the clause saying that not all of its Ts
+# are used, so the blocking clauses are short.
+
+import os
+import sys
+from itertools import product
+from sys import argv
+from clauses import tiling_clauses
+from geometry import Board
+from dimacs import open_output
+from tilings import encode, squares
+# Shared solver helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from enumeration import enumerate_orbits
+
+
+# The maps (i, j) -> (i', j') of the rectangle onto itself, other than the identity, 0-based
+def board_symmetries(H, W):
+    syms = [lambda i, j: (i, W-1-j), lambda i, j: (H-1-i, j), lambda i, j: (H-1-i, W-1-j)]
+    if H == W:
+        syms += [lambda i, j: (j, i), lambda i, j: (W-1-j, H-1-i),
+                 lambda i, j: (j, H-1-i), lambda i, j: (W-1-j, i)]
+    return syms
+
+
+# For each symmetry, the map of solutions it gives: each T goes to the T covering the images of
+# its squares. Only the Ts of some tiling need an image among the variables.
+def tiling_symmetries(H, W, all_tets):
+    by_squares = {frozenset(squares(t)): idx for idx, t in enumerate(all_tets, start=1)}
+    maps = []
+    for sym in board_symmetries(H, W):
+        perm = {idx: by_squares.get(frozenset(sym(i, j) for i, j in squares(t)))
+                for idx, t in enumerate(all_tets, start=1)}
+        maps.append(lambda solution, perm=perm: frozenset(perm[v] for v in solution))
+    return maps
+
+
+# Cubes choosing one T for each of K squares spread across the middle row
+def make_cubes(board, K):
+    chosen = [(board.H//2, (k+1)*board.W//(K+1)) for k in range(K)]
+    return [sorted(set(c)) for c in product(*[board.variables_at(i, j) for i, j in chosen])]
+
+
+if __name__ == "__main__":
+    options = {'--out': None, '--split': 0, '--workers': 1}
+    for name in options:
+        if name in argv:
+            k = argv.index(name)
+            options[name] = argv[k+1] if name == '--out' else int(argv[k+1])
+            del argv[k:k+2]
+    H, W, L = map(int, argv[1:4])
+
+    board = Board(H, W)
+    all_tets = board.all_tets()
+    formula = list(tiling_clauses(board, L))
+    cubes = make_cubes(board, options['--split'])
+
+    out = open_output(options['--out']) if options['--out'] else None
+    def on_orbit(solution, size):
+        if out:
+            out.write(b"%d %s\n" % (size, encode([all_tets[v-1] for v in solution]).encode()))
+    orbits, tilings = enumerate_orbits(formula, len(all_tets), tiling_symmetries(H, W, all_tets),
+                                       lambda solution: [-v for v in solution], on_orbit,
+                                       cubes, options['--workers'], verbose=len(cubes) > 1)
+    if out:
+        out.close()
+    print(H, W, L)
+    print("Tilings:", tilings)
+    print("Up to symmetry:", orbits)
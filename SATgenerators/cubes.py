@@ -0,0 +1,167 @@
+# Cube-and-conquer for the tiling formulas of build_SAT.py
+#
+# A hard formula is split into many "cubes", each a list of tets that are required to be in
+# the tiling, which is exactly what build_SAT.py and build_and_solve_SAT.py accept as ASSUM.
+# The cubes are the ways of covering a band of squares across the middle of the board: we go
+# through the band square by square, and each square not yet covered gets, in turn, every tet
+# that covers it without overlapping the tets already chosen. So the cubes do not overlap,
+# and the formula is satisfiable if and only if one of the cubes is.
+#
+# The work is shared through a directory, which can be on a disk shared by several machines:
+#   DIR/meta.txt          H W L
+#   DIR/formula.cnf.gz    the formula, as written by build_SAT.py
+#   DIR/todo/NNNNNN       one cube per file, as a line of tet indices
+#   DIR/claimed/NNNNNN    cubes being worked on. A worker claims a cube by renaming it here.
+#   DIR/done/NNNNNN       "UNSAT", or "SAT" and the tiling string
+#   DIR/SAT               the tiling string, once any cube is found satisfiable
+#
+# Usage: python3 cubes.py split 24 40 2 work24x40 [BAND]
+#   builds the formula and the cubes for the BAND (default 8) middle squares of the middle row
+# Usage: python3 cubes.py work work24x40 [N] [--time S]
+#   runs N (default: one per CPU) workers on this machine until the cubes run out, or for S
+#   seconds. A worker that runs out of time, or gets a SIGTERM, puts its cube back in todo
+#   and stops, so workers can be killed and started again at any time (see SATtools/budget.py).
+# Usage: python3 cubes.py status work24x40
+#   counts the cubes in each state, and says whether the formula is SAT or UNSAT
+# Usage: python3 cubes.py requeue work24x40
+#   puts claimed but unfinished cubes (from killed workers) back in todo
+
+import os
+import signal
+import socket
+import sys
+from sys import argv
+from multiprocessing import Process
+from pysat.formula import CNF
+from pysat.solvers import Glucose4
+import build_SAT
+from dimacs import CNFWriter
+from geometry import Board
+from tilings import encode
+# Shared solver helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from budget import Budget
+
+
+# The band of squares to split on: the middle `band` squares of the middle row
+def middle_band(H, W, band):
+    j0 = max(0, (W - band) // 2)
+    return [(H // 2, j) for j in range(j0, min(W, j0 + band))]
+
+
+# Every way of covering the squares in the band with non-overlapping tets, as lists of tet indices
+def enumerate_cubes(squares, board):
+    cubes = []
+    def extend(k, chosen, covered):
+        while k < len(squares) and squares[k] in covered:
+            k += 1
+        if k == len(squares):
+            cubes.append(chosen)
+            return
+        for v in board.variables_at(*squares[k]):
+            ss = board.squares_of(v)
+            if any(s in covered for s in ss):
+                continue
+            extend(k + 1, chosen + [v], covered | set(ss))
+    extend(0, [], set())
+    return cubes
+
+
+def split(H, W, L, dir, band):
+    board = Board(H, W)
+    for sub in ['todo', 'claimed', 'done']:
+        os.makedirs(os.path.join(dir, sub), exist_ok=True)
+    with open(os.path.join(dir, 'meta.txt'), 'w') as f:
+        f.write(f'{H} {W} {L}\n')
+    cnf = CNFWriter(os.path.join(dir, 'formula.cnf.gz'))
+    build_SAT.build_and_print_CNF(board, L, [], cnf)
+    cnf.close(len(board))
+    cubes = enumerate_cubes(middle_band(H, W, band), board)
+    for n, cube in enumerate(cubes):
+        with open(os.path.join(dir, 'todo', '%06d' % n), 'w') as f:
+            f.write(" ".join(map(str, cube)) + "\n")
+    print(len(cubes), "cubes written to", os.path.join(dir, 'todo'))
+
+
+# The tiling string of a model, as print_tiling_string in build_and_solve_SAT.py makes it
+def tiling_string(all_tets, model):
+    return encode([all_tets[v-1] for v in model if v > 0])
+
+
+# Claim the next cube in todo, or return None when there are none left
+def claim(dir):
+    for name in sorted(os.listdir(os.path.join(dir, 'todo'))):
+        try:
+            os.rename(os.path.join(dir, 'todo', name), os.path.join(dir, 'claimed', name))
+        except OSError:
+            continue  # Another worker got it first
+        with open(os.path.join(dir, 'claimed', name)) as f:
+            return name, list(map(int, f.read().split()))
+    return None
+
+
+# One worker: solve cubes until there are none left, until some worker finds a tiling, or
+# until the budget runs out
+def work(dir, budget):
+    with open(os.path.join(dir, 'meta.txt')) as f:
+        H, W, L = map(int, f.read().split())
+    all_tets = Board(H, W).all_tets()
+    solver = Glucose4(bootstrap_with=CNF(from_file=os.path.join(dir, 'formula.cnf.gz')).clauses)
+    worker = f'{socket.gethostname()}-{os.getpid()}'
+    # A SIGTERM (from the parent, see below) lets the worker put its cube back before it stops
+    with budget.watching():
+        while budget.left() and not os.path.exists(os.path.join(dir, 'SAT')):
+            job = claim(dir)
+            if job is None: break
+            name, cube = job
+            answer = budget.solve(solver, cube)
+            if answer is None:  # Stopped: the cube goes back for another worker
+                os.rename(os.path.join(dir, 'claimed', name), os.path.join(dir, 'todo', name))
+                print(worker, name, "returned")
+                break
+            if answer:
+                tiling = tiling_string(all_tets, solver.get_model())
+                result = "SAT\n" + tiling + "\n"
+                with open(os.path.join(dir, 'SAT'), 'w') as f:  # Ready for DrawTiling
+                    f.write(f'{H} {W} {L}\n{tiling}\n')
+            else:
+                result = "UNSAT\n"
+            with open(os.path.join(dir, 'done', name), 'w') as f:
+                f.write(result)
+            os.remove(os.path.join(dir, 'claimed', name))
+            print(worker, name, result.split()[0])
+    solver.delete()
+
+
+def status(dir):
+    counts = {sub: len(os.listdir(os.path.join(dir, sub))) for sub in ['todo', 'claimed', 'done']}
+    print("todo: %(todo)d  claimed: %(claimed)d  done: %(done)d" % counts)
+    if os.path.exists(os.path.join(dir, 'SAT')):
+        with open(os.path.join(dir, 'SAT')) as f:
+            print("SAT\n" + f.read(), end="")
+    elif counts['todo'] == 0 and counts['claimed'] == 0:
+        print("UNSAT")
+
+
+def requeue(dir):
+    for name in os.listdir(os.path.join(dir, 'claimed')):
+        os.rename(os.path.join(dir, 'claimed', name), os.path.join(dir, 'todo', name))
+
+
+if __name__ == "__main__":
+    if argv[1] == 'split':
+        H, W, L = map(int, argv[2:5])
+        split(H, W, L, argv[5], int(argv[6]) if len(argv) > 6 else 8)
+    elif argv[1] == 'work':
+        budget = Budget.from_argv(argv)
+        N = int(argv[3]) if len(argv) > 3 else os.cpu_count()
+        workers = [Process(target=work, args=(argv[2], budget)) for _ in range(N)]
+        for w in workers: w.start()
+        # A SIGTERM to this process is passed on to the workers, which then stop cleanly
+        signal.signal(signal.SIGTERM, lambda signum, frame: [w.terminate() for w in workers])
+        for w in workers: w.join()
+        status(argv[2])
+    elif argv[1] == 'status':
+        status(argv[2])
+    elif argv[1] == 'requeue':
+        requeue(argv[2])
@@ -0,0 +1,112 @@
+# Writes DIMACS cnf formulas in a single pass over the clauses.
+#
+# The "p cnf" header has to come first, but we only know the number of clauses once they
+# have all been generated. So CNFWriter formats the clauses into a spool (kept in memory while
+# it is small, moved to a temporary file when it gets big), and when the formula is closed we
+# write the header and then copy the spool out in large blocks.
+#
+# When the number of clauses can be counted beforehand, DIMACSStream writes the header at once
+# and each clause as it comes, so nothing is kept and an external solver reading from a pipe
+# can start parsing right away.
+#
+# The output goes to stdout, or to a file. Files ending in .gz or .xz are compressed.
+
+import gzip
+import lzma
+import shutil
+import sys
+import tempfile
+
+SPOOL_IN_MEMORY = 64 << 20  # Bytes of spool kept in memory before moving to a temp file
+BLOCK_SIZE = 1 << 20        # Bytes per write when copying the spool to the output
+LINES_PER_FLUSH = 1 << 16   # Clauses formatted before they are written to the spool
+
+
+# Open the binary stream that a CNF should be written to
+def open_output(path):
+    if path is None or path == '-':
+        return sys.stdout.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wb')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'wb')
+    return open(path, 'wb')
+
+
+# Collects clauses with the same add_clause interface as the pysat solvers, and
+# writes the whole formula, header first, when closed.
+class CNFWriter:
+    def __init__(self, path=None):
+        self.path = path
+        self.comments = []
+        self.numclauses = 0
+        self.lines = []
+        self.spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_IN_MEMORY)
+
+    # Comment lines are written just before the header
+    def comment(self, text):
+        self.comments.append("c " + text + "\n")
+
+    def add_clause(self, clause):
+        self.lines.append(" ".join(map(str, clause)) + " 0\n")
+        self.numclauses += 1
+        if len(self.lines) >= LINES_PER_FLUSH:
+            self.flush()
+
+    def append_formula(self, clauses):
+        for clause in clauses:
+            self.add_clause(clause)
+
+    # Move the formatted clauses into the spool
+    def flush(self):
+        self.spool.write("".join(self.lines).encode())
+        self.lines = []
+
+    # Write the comments, the header and then all the clauses to the output
+    def close(self, numvars):
+        self.flush()
+        out = open_output(self.path)
+        header = "".join(self.comments) + "p cnf %d %d\n" % (numvars, self.numclauses)
+        out.write(header.encode())
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, out, BLOCK_SIZE)
+        self.spool.close()
+        if out is sys.stdout.buffer:
+            out.flush()
+        else:
+            out.close()
+
+
+# Writes clauses straight to the output, with the same add_clause interface as CNFWriter.
+# The header is written first, so the number of clauses must be given up front.
+class DIMACSStream:
+    def __init__(self, path, numvars, numclauses, comments=[]):
+        self.out = open_output(path)
+        self.numclauses = numclauses
+        self.written = 0
+        self.lines = []
+        header = "".join("c " + text + "\n" for text in comments) + "p cnf %d %d\n" % (numvars, numclauses)
+        self.out.write(header.encode())
+
+    def add_clause(self, clause):
+        self.lines.append(" ".join(map(str, clause)) + " 0\n")
+        self.written += 1
+        if len(self.lines) >= LINES_PER_FLUSH:
+            self.flush()
+
+    def append_formula(self, clauses):
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def flush(self):
+        self.out.write("".join(self.lines).encode())
+        self.lines = []
+
+    def close(self):
+        self.flush()
+        if self.out is sys.stdout.buffer:
+            self.out.flush()
+        else:
+            self.out.close()
+        if self.written != self.numclauses:
+            raise ValueError("header promised %d clauses, but %d were written" % (self.numclauses, self.written))
@@ -0,0 +1,134 @@
+# The geometry of the Ts on an HxW board, as NumPy arrays, for all the tiling generators.
+#
+# A tetromino on the board is described by a triple (i, j, dir)
+# (i, j) is the "center" of the tetromino, and dir is up, down, left or right.
+# Thus, for example, the Ts covering (0, 0) are in the list:
+# [(0, 1, 'd'), (1, 0, 'r')]
+# And the Ts covering (0, 1) are in the list:
+# [(0, 1, 'd'), (0, 2, 'd'), (1, 1, 'u'), (1, 1, 'l'), (1, 1, 'r')]
+#
+# The Ts that can be in a tiling are found for all centers at once: a T of each direction
+# may only sit at the centers with Walkup's residues (i%4, j%4), and must lie inside the
+# board. In the symmetric modes a variable stands for a T together with its rotated copies,
+# which must all lie inside the board as well:
+#   none     every T is a variable (build_SAT.py, build_and_solve_SAT.py)
+#   rot180   a T and its 180-degree rotation about the center of the board (build_and_solve_SAT2.py)
+#   rot90    a T and its three 90-degree rotations, on square boards (build_and_solve_SAT4.py)
+#
+# The Ts are numbered from 1, in the order of their centers in reading order, and then of
+# their directions as given, which is the order the programs have always used, so the indices
+# given as assumptions on the command line mean the same Ts.
+#
+# Squares are numbered i*W + j. A Board holds
+#   tets      (N, 3) int32, the i, j and direction (an index into dirs) of T number k+1 in row k
+#   orbit     (N, 4R) int32, the squares covered by the T and its R-1 rotated copies, the T's own
+#             four first. A square can appear twice, if a T overlaps its own copy.
+#   squares   (N, 4), the T's own squares, the first columns of orbit
+#   starts, covering   the map from squares to the Ts covering them, in compressed sparse row
+#             form: the Ts covering square s are covering[starts[s]:starts[s+1]], as variables,
+#             in increasing order
+# so a 100x100 board takes a few megabytes and a few milliseconds.
+
+import numpy as np
+
+DIRS = ['u', 'd', 'l', 'r']
+
+# The squares of a T, relative to its center
+OFFSETS = {
+    'u': [(0, 0), (0, -1), (0, 1), (-1, 0)],
+    'd': [(0, 0), (0, -1), (0, 1), (1, 0)],
+    'l': [(0, 0), (0, -1), (1, 0), (-1, 0)],
+    'r': [(0, 0), (-1, 0), (0, 1), (1, 0)],
+}
+
+# The residues (i%4, j%4) of the centers at which a T of each direction may sit (Walkup)
+RESIDUES = {
+    'u': [(3, 2), (1, 3), (1, 0), (3, 1)],
+    'd': [(0, 2), (2, 3), (2, 0), (0, 1)],
+    'l': [(2, 3), (3, 1), (0, 1), (1, 3)],
+    'r': [(2, 0), (3, 2), (0, 2), (1, 0)],
+}
+
+
+# For each symmetry mode, the rotations (y, x) -> (y', x') whose images of a T are covered
+# along with it, the identity first. They work on arrays of coordinates as well as on numbers.
+def rotations(H, W, symmetry):
+    return {
+        'none': [lambda y, x: (y, x)],
+        'rot180': [lambda y, x: (y, x), lambda y, x: (H-1-y, W-1-x)],
+        'rot90': [lambda y, x: (y, x), lambda y, x: (W-1-x, y),
+                  lambda y, x: (H-1-y, W-1-x), lambda y, x: (x, H-1-y)],
+    }[symmetry]
+
+
+# The HxW boolean array of the centers with Walkup's residues for direction d
+def residue_mask(H, W, d):
+    allowed = np.zeros((4, 4), dtype=bool)
+    allowed[tuple(zip(*RESIDUES[d]))] = True
+    return allowed[np.arange(H)[:, None] % 4, np.arange(W)[None, :] % 4]
+
+
+class Board:
+    def __init__(self, H, W, dirs=DIRS, symmetry='none'):
+        self.H, self.W = H, W
+        self.dirs = list(dirs)
+        self.symmetry = symmetry
+        I, J = np.indices((H, W))
+        rots = rotations(H, W, symmetry)
+        masks, orbits = [], []
+        for d in self.dirs:
+            # The squares of the T centered at each (i, j), and of its copies, on the last axis
+            images = [r(I + di, J + dj) for r in rots for di, dj in OFFSETS[d]]
+            y = np.stack([y for y, _ in images], axis=-1)
+            x = np.stack([x for _, x in images], axis=-1)
+            inside = ((y >= 0) & (y < H) & (x >= 0) & (x < W)).all(axis=-1)
+            masks.append(residue_mask(H, W, d) & inside)
+            orbits.append(y * W + x)
+        # np.nonzero goes through the centers in reading order, and the directions at each
+        i, j, k = np.nonzero(np.stack(masks, axis=-1))
+        self.tets = np.stack([i, j, k], axis=1).astype(np.int32)
+        self.orbit = np.stack(orbits, axis=2)[i, j, k].astype(np.int32)
+        self.squares = self.orbit[:, :4]
+
+        # Sort the (square, T) incidences by square; the stable sort keeps the Ts in order
+        flat = self.orbit.ravel()
+        order = np.argsort(flat, kind='stable')
+        self.covering = (order // self.orbit.shape[1] + 1).astype(np.int32)
+        self.starts = np.zeros(H*W + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat, minlength=H*W), out=self.starts[1:])
+
+    def __len__(self):
+        return len(self.tets)
+
+    # The Ts as (i, j, dir) triples, T number k+1 at position k
+    def all_tets(self):
+        return [(i, j, self.dirs[k]) for i, j, k in self.tets.tolist()]
+
+    # The map from (i, j, dir) triples to variables
+    def tet_to_idx(self):
+        return {t: idx for idx, t in enumerate(self.all_tets(), start=1)}
+
+    # The variables of the Ts covering square (i, j)
+    def variables_at(self, i, j):
+        s = i*self.W + j
+        return self.covering[self.starts[s]:self.starts[s+1]].tolist()
+
+    # For each square, in reading order, the list of variables of the Ts covering it
+    def by_square(self):
+        covering, starts = self.covering.tolist(), self.starts.tolist()
+        return [covering[a:b] for a, b in zip(starts, starts[1:])]
+
+    # The squares (i, j) of T number v itself, without its copies
+    def squares_of(self, v):
+        return [divmod(s, self.W) for s in self.squares[v-1].tolist()]
+
+    # The HxW grid holding, at (i, j), the variable of the T (i, j, d), or 0 if there is none
+    def grid(self, d):
+        grid = np.zeros((self.H, self.W), dtype=np.int32)
+        rows = np.nonzero(self.tets[:, 2] == self.dirs.index(d))[0]
+        grid[self.tets[rows, 0], self.tets[rows, 1]] = rows + 1
+        return grid
+
+    # The grids of all the directions, for the NOAP clauses (see noap.py)
+    def grids(self):
+        return [self.grid(d) for d in self.dirs]
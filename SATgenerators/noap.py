@@ -0,0 +1,103 @@
+# NumPy-backed enumeration of the NOAP clauses for the tiling generators.
+#
+# An AP of tetrominos is a list of L+1 tets, all with the same direction, whose centers
+# (i, j) form an arithmetic progression on the board. The NOAP clause for such an AP says
+# that not all of its tets are used: -t0 -t1 ... -tL 0
+#
+# Rather than walking every start cell and step vector in Python, we lay the tet indices
+# of one direction out on an HxW grid (0 where there is no tet of that direction, see
+# geometry.Board.grid), and
+# for each step vector (di, dj) take L+1 shifted slices of that grid. Row k of the stacked
+# slices is the AP starting at the k-th start cell, and it is an AP of tets exactly when
+# none of its entries is 0.
+
+import numpy as np
+
+
+# All step vectors (di, dj) for which an AP of length L+1 fits in an HxW board.
+# Each geometric AP has two step vectors, (di, dj) and (-di, -dj), and we only list
+# the one with dj > 0, or with dj == 0 and di > 0, so every AP is produced once.
+def ap_steps(H, W, L):
+    for di in range(-((H-1)//L), (H-1)//L + 1):
+        for dj in range((W-1)//L + 1):
+            if dj == 0 and di <= 0:
+                continue
+            yield di, dj
+
+
+# For each step vector, an (n, L+1) array whose rows are the APs of nonzero grid entries
+def ap_blocks(grid, L):
+    H, W = grid.shape
+    for di, dj in ap_steps(H, W, L):
+        # Start cells (i, j) with i0 <= i < i1 and 0 <= j < j1 keep the whole AP on the board
+        i0, i1 = max(0, -L*di), min(H, H - L*di)
+        j1 = W - L*dj
+        terms = [grid[i0 + t*di : i1 + t*di, t*dj : j1 + t*dj] for t in range(L+1)]
+        keep = np.logical_and.reduce([term != 0 for term in terms])
+        if keep.any():
+            yield np.stack([term[keep] for term in terms], axis=1)
+
+
+# Yield the NOAP clauses for the APs in each of the grids, as arrays of negative literals,
+# one clause per row
+def noap_blocks(grids, L):
+    for grid in grids:
+        for block in ap_blocks(grid, L):
+            yield -block
+
+
+# Yield every NOAP clause, as a list of negative literals, for the APs in each of the grids
+def noap_clauses(grids, L):
+    for block in noap_blocks(grids, L):
+        yield from block.tolist()
+
+
+# The number of clauses that noap_clauses(grids, L) will produce
+def count_noap_clauses(grids, L):
+    return sum(len(block) for grid in grids for block in ap_blocks(grid, L))
+
+
+# The length of the longest AP of tets that are used (positive) in the model
+def longest_ap(grids, model):
+    chosen = np.zeros(max(int(g.max()) for g in grids) + 1, dtype=bool)
+    used = [v for v in model if 0 < v < len(chosen)]
+    chosen[used] = True
+    used_grids = [np.where(chosen[g], g, 0) for g in grids]
+    if not any(g.any() for g in used_grids):
+        return 0
+    # m is the length of the longest AP found so far; look for one of length m+1
+    m = 1
+    while any(True for g in used_grids for block in ap_blocks(g, m)):
+        m += 1
+    return m
+
+
+# Find the smallest L for which the solver's formula has a tiling with no AP longer than L.
+# Each time a tiling is found we forbid APs as long as its longest one and solve again,
+# keeping the same solver, so what it learned about the weaker formula carries over.
+# solve(solver, assumptions) may stop early and answer None (see SATtools/budget.py); it is
+# solver.solve by default. To resume, pass the L and model of the best tiling found before.
+# on_model(L, model) is called for each better tiling, to save it, and on_round(L) before each
+# solve, with the L asked for (0 for the first solve, which allows APs of any length).
+# Returns (L, model, done): the best tiling found, or (None, None) if there is no tiling at all,
+# and whether that L is known to be the smallest (not if solve stopped early).
+def find_smallest_L(solver, grids, assumptions=[], solve=None, L=None, model=None, on_model=None, on_round=None):
+    if solve is None:
+        solve = lambda solver, assumptions: solver.solve(assumptions=assumptions)
+    if L is not None and L > 1:
+        solver.append_formula(noap_clauses(grids, L - 1))
+    while L is None or L > 1:
+        if on_round:
+            on_round(L - 1 if L else 0)
+        answer = solve(solver, assumptions)
+        if answer is None:
+            return L, model, False
+        if not answer:
+            break
+        model = solver.get_model()
+        L = longest_ap(grids, model)
+        if on_model:
+            on_model(L, model)
+        if L > 1:
+            solver.append_formula(noap_clauses(grids, L - 1))
+    return L, model, True
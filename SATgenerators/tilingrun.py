@@ -0,0 +1,91 @@
+# The steps build_and_solve_SAT.py, build_and_solve_SAT2.py and build_and_solve_SAT4.py share:
+# giving the tiling formula of a board to the solver, and solving it with a budget and a checkpoint.
+# The programs differ only in the directions and symmetry of their Board (see geometry.py),
+# and in the kind their formulas are cached under (see SATtools/cache.py).
+import os
+import sys
+import noap
+import clauses
+import geometry
+from clauses import add_tiling_clauses, tiling_store, family_sizes
+from noap import find_smallest_L
+# Shared solver helpers live in ../SATtools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'SATtools'))
+from cache import load_arrays, save_arrays, cache_path
+from budget import Checkpoint
+from clausestore import ClauseStore
+
+
+# The cache files of program's formulas: its kind, with the encoding of ONCE unless that is pairwise
+def cache_key(program, board, L, encoding, kind):
+    sources = [program, noap.__file__, clauses.__file__, geometry.__file__]
+    kind = kind if encoding == 'pairwise' else kind + '-' + encoding
+    return kind, board.H, board.W, L, board.symmetry, sources
+
+
+# Give the formula to solver: from the cache of formulas if it is there, else build it (and cache it).
+# Without the cache or dimacs, the clauses go from the generators straight into the solver,
+# so the formula is never held in full (see clauses.py). With dimacs, it is also written there.
+# Records the phases and the clauses of each family in run. Returns the number of variables,
+# and the number of clauses of each family.
+def load_tiling(solver, program, board, L, encoding, kind, run, use_cache=True, dimacs=None):
+    key = cache_key(program, board, L, encoding, kind)
+    with run.phase('cache'):
+        cached = load_arrays(*key) if use_cache else None
+    formula = None
+    if cached:
+        lits, offsets, _ = cached
+        formula = ClauseStore(lits, offsets)
+    elif use_cache or dimacs:
+        with run.phase('clauses'):
+            formula = tiling_store(board, L, encoding)
+        if use_cache:
+            with run.phase('save'):
+                save_arrays(*key, *formula.arrays(), board.all_tets())
+
+    if formula is not None:
+        with run.phase('load'):
+            formula.load_into(solver)
+        # The formula is the H*W COVER clauses, then the ONCE clauses, then the NOAP clauses
+        numvars, sizes = formula.numvars(), family_sizes(board.H, board.W, L, board.grids(), len(formula))
+    else:
+        # The clauses are generated as the solver takes them, so this phase is both
+        with run.phase('clauses'):
+            numvars, sizes = add_tiling_clauses(solver, board, L, encoding)
+    run.add_clauses(sizes)
+    numvars = max(len(board), numvars)
+    if dimacs:
+        with run.phase('dimacs'):
+            formula.write_dimacs(dimacs, numvars)
+    return numvars, sizes
+
+
+# Solve for a tiling with no AP longer than L, or with L = 0 find the smallest such L (see noap.py),
+# within budget (see SATtools/budget.py). The checkpoint at checkpoint_path holds the best tiling so
+# far when L = 0, and the answer once there is one, so the same command picks up where it stopped.
+# Returns L, the tiling (a model) and whether the search finished.
+def solve_tiling(solver, program, board, L, encoding, kind, assumptions, run, budget, checkpoint_path,
+                 on_round=None):
+    numtets = len(board)
+    checkpoint = Checkpoint(checkpoint_path, [os.path.basename(program), board.H, board.W, L, assumptions,
+                                              os.path.basename(cache_path(*cache_key(program, board, L, encoding, kind)))])
+    progress = checkpoint.load() or {}
+    def used(model):
+        return [v for v in model if 0 < v <= numtets] if model else None
+
+    if 'done' in progress:
+        L, solution, done = progress['L'], progress['model'], True
+    elif L > 0:
+        with run.phase('solve'):
+            answer = budget.solve(solver, assumptions)
+        solution, done = solver.get_model() if answer else None, answer is not None
+    else:
+        with run.phase('solve'):
+            L, solution, done = find_smallest_L(solver, board.grids(), assumptions, budget.solve, progress.get('L'),
+                                                progress.get('model'),
+                                                lambda L, model: checkpoint.save({'L': L, 'model': used(model)}),
+                                                on_round)
+    run.add_solver(solver)
+    if done:
+        checkpoint.save({'done': True, 'L': L, 'model': used(solution)})
+    return L, solution, done
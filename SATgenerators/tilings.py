@@ -0,0 +1,244 @@
+# Decodes tilings by Ts, and checks them independently of the SAT formulas: that every square
+# is covered exactly once, and how long the longest AP of Ts of the same direction really is.
+#
+# A tiling comes either as a tiling string (see print_tiling_string in build_and_solve_SAT.py),
+# or as one of the pictures Graphics/HxW-L.eps made by DrawTiling.java, whose lines between
+# the tiles are enough to recover the tiling.
+#
+# Usage: python3 tilings.py
+#   checks every picture in ../Graphics: a tiling of HxW, with no AP longer than L
+# Usage: python3 tilings.py FILE ...
+#   checks the given files: .eps pictures, or text files holding H W L and then a tiling string
+#   (the input of DrawTiling, or the SAT file of cubes.py)
+# Usage: python3 tilings.py --db ../sweep.db
+#   checks every tiling in the store of sweep.py
+#
+# Each line of output is the file (or store row) and "Good", or the first problem found.
+
+import glob
+import os
+import re
+import sqlite3
+from sys import argv
+from multiprocessing import Pool
+import numpy as np
+
+DIRS = ['d', 'r', 'u', 'l']  # The direction for each symbol 0, 1, 2, 3 of a tiling string
+
+# For each direction, the squares of a T relative to the first of its squares in reading order
+# (the one a tiling string places it at), and the position of its center, (i, j) in squares_of
+SHAPES = {
+    'd': [(0, 0), (0, 1), (0, 2), (1, 1)],
+    'u': [(0, 0), (1, -1), (1, 0), (1, 1)],
+    'l': [(0, 0), (1, -1), (1, 0), (2, 0)],
+    'r': [(0, 0), (1, 0), (1, 1), (2, 0)],
+}
+CENTERS = {'d': (0, 1), 'u': (1, 0), 'l': (1, 0), 'r': (1, 0)}
+
+
+# Decode a tiling string for an HxW board.
+# Returns the board, an HxW array holding at each square the number (from 1) of the T covering
+# it, and the list of the Ts as (i, j, dir) with (i, j) the center, in the order of the string.
+# Raises ValueError if the string does not tile the board.
+def decode(H, W, s):
+    board = np.zeros((H, W), dtype=np.int32)
+    tets = []
+    flat = board.ravel()
+    p = 0  # Squares before p are all covered, so the next T starts at the first empty one from p
+    for k, c in enumerate(s, start=1):
+        while p < H*W and flat[p]:
+            p += 1
+        if p == H*W:
+            raise ValueError("the board is full, but the string goes on at T %d" % k)
+        if c not in '0123':
+            raise ValueError("symbol %r at T %d" % (c, k))
+        d = DIRS[int(c)]
+        i, j = divmod(p, W)
+        for di, dj in SHAPES[d]:
+            if not (0 <= i + di < H and 0 <= j + dj < W):
+                raise ValueError("T %d (%s at %d, %d) sticks out of the board" % (k, d, i, j))
+            if board[i + di, j + dj]:
+                raise ValueError("T %d (%s at %d, %d) overlaps T %d" % (k, d, i, j, board[i + di, j + dj]))
+            board[i + di, j + dj] = k
+        tets.append((i + CENTERS[d][0], j + CENTERS[d][1], d))
+    if not board.all():
+        i, j = np.argwhere(board == 0)[0]
+        raise ValueError("square (%d, %d) is not covered" % (i, j))
+    return board, tets
+
+
+# The tiling string of a list of Ts, the inverse of decode
+def encode(tets):
+    reps = sorted((i - CENTERS[d][0], j - CENTERS[d][1], d) for i, j, d in tets)
+    return "".join(str(DIRS.index(d)) for _, _, d in reps)
+
+
+# Recover the Ts from a picture made by DrawTiling.java. Between the tiles it draws a segment
+# "n x0 y0 m x1 y1 l s" on each side shared by squares of different tiles, before it draws
+# the outline of the board. The squares of each tile are what is left connected.
+# Returns H, W and the Ts, or raises ValueError if the pieces are not all Ts.
+def read_eps(path):
+    with open(path) as f:
+        text = f.read()
+    box = re.search(r"%%BoundingBox: 0 0 (\d+) (\d+)", text)
+    W, H = (int(box.group(1)) - 4) // 10, (int(box.group(2)) - 4) // 10
+    right = np.zeros((H, W), dtype=bool)  # A line between (i, j) and (i, j+1)
+    down = np.zeros((H, W), dtype=bool)   # A line between (i, j) and (i+1, j)
+    lines = text[text.index("0.2 0.2 0.2 setrgbcolor"):text.index("0.00 0.00 0.00 setrgbcolor")]
+    for x0, y0, x1, y1 in re.findall(r"n (\d+) (\d+) m (\d+) (\d+) l s", lines):
+        x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+        if x0 == x1:
+            right[y0, x0 - 1] = True
+        else:
+            down[y0 - 1, x0] = True
+
+    # Label the pieces, and read each one as a T
+    label = np.zeros((H, W), dtype=np.int32)
+    tets = []
+    for i in range(H):
+        for j in range(W):
+            if label[i, j]: continue
+            label[i, j] = len(tets) + 1
+            piece, stack = [], [(i, j)]
+            while stack:
+                y, x = stack.pop()
+                piece.append((y, x))
+                for ny, nx, open_ in [(y, x+1, x+1 < W and not right[y, x]), (y, x-1, x > 0 and not right[y, x-1]),
+                                      (y+1, x, y+1 < H and not down[y, x]), (y-1, x, y > 0 and not down[y-1, x])]:
+                    if open_ and not label[ny, nx]:
+                        label[ny, nx] = len(tets) + 1
+                        stack.append((ny, nx))
+            shape = sorted((y - i, x - j) for y, x in piece)
+            d = [d for d in SHAPES if SHAPES[d] == shape]
+            if not d:
+                raise ValueError("the piece at (%d, %d) is not a T" % (i, j))
+            d = d[0]
+            tets.append((i + CENTERS[d][0], j + CENTERS[d][1], d))
+    return H, W, tets
+
+
+# H, W and the Ts of a tiling in a file: a picture (.eps), or H W L and a tiling string
+def read_tiling(path):
+    if path.endswith('.eps'):
+        return read_eps(path)
+    with open(path) as f:
+        H, W = map(int, f.readline().split()[:2])
+        _, tets = decode(H, W, f.readline().strip())
+    return H, W, tets
+
+
+# The squares of a T (i, j, dir), with (i, j) its center
+def squares(t):
+    i, j, d = t
+    i0, j0 = i - CENTERS[d][0], j - CENTERS[d][1]
+    return [(i0 + di, j0 + dj) for di, dj in SHAPES[d]]
+
+
+# Warm starts for the tiling programs (--seed FILE): the initial phases, as literals, that lay
+# the tiling in path on the new board. Its Ts that are still variables are used, and the other
+# variables inside the old board are not, so the solver starts from the old tiling, cropped if
+# the new board is smaller. Ts reaching past the old board keep the solver's own phase.
+def seed_phases(path, tet_to_idx):
+    H, W, tets = read_tiling(path)
+    used = set(tets)
+    phases = []
+    for t, idx in tet_to_idx.items():
+        if t in used:
+            phases.append(idx)
+        elif all(i < H and j < W for i, j in squares(t)):
+            phases.append(-idx)
+    return phases
+
+
+# The length of the longest AP of Ts with the same direction.
+# For each direction, lay the centers out on a grid, and for each step vector (di, dj) find
+# the length of the longest AP ending at each center: run[p] = run[p - step] + 1 at a center,
+# and 0 elsewhere. All centers are updated at once, and this is repeated until nothing changes,
+# as many times as the longest AP with that step is long. A step only needs trying if an AP
+# longer than the best so far fits on the board with it.
+def longest_ap(H, W, tets):
+    best = 0
+    for d in SHAPES:
+        grid = np.zeros((H, W), dtype=bool)
+        for i, j, dd in tets:
+            if dd == d:
+                grid[i, j] = True
+        if not grid.any():
+            continue
+        best = max(best, 1)
+        for dj in range(W):
+            for di in range(-(H-1), H):
+                if dj == 0 and di <= 0: continue
+                if best * abs(di) > H-1 or best * dj > W-1: continue
+                best = max(best, longest_run(grid, di, dj))
+    return best
+
+
+# The longest AP with step (di, dj) among the True entries of grid, by the DP above
+def longest_run(grid, di, dj):
+    H, W = grid.shape
+    run = grid.astype(np.int32)
+    # Squares p whose p - step is on the board, and the squares p - step
+    to = (slice(max(0, di), H + min(0, di)), slice(dj, W))
+    frm = (slice(max(0, -di), H - max(0, di)), slice(0, W - dj))
+    while True:
+        new = run.copy()
+        new[to] = np.where(grid[to], run[frm] + 1, 0)
+        if (new == run).all():
+            return int(run.max())
+        run = new
+
+
+# Check one file, and return the line to print for it
+def check(path):
+    name = os.path.basename(path)
+    m = re.match(r"(\d+)x(\d+)-(\d+)\.eps$", name)
+    try:
+        if m:
+            H, W, tets = read_eps(path)
+            L = int(m.group(3))
+            if (H, W) != (int(m.group(1)), int(m.group(2))):
+                return "%s: Error: the picture is %dx%d" % (name, H, W)
+        else:
+            with open(path) as f:
+                L = int(f.readline().split()[2])
+            H, W, tets = read_tiling(path)
+    except ValueError as e:
+        return "%s: Error: %s" % (name, e)
+    return verdict(name, H, W, L, tets)
+
+
+# Good if the tiling has no AP longer than L, else the length of its longest AP
+def verdict(name, H, W, L, tets):
+    longest = longest_ap(H, W, tets)
+    if longest > L:
+        return "%s: Error: it has an AP of length %d" % (name, longest)
+    if longest < L:
+        return "%s: Good (its longest AP has length %d)" % (name, longest)
+    return "%s: Good" % name
+
+
+# Check a tiling string held in the store of sweep.py
+def check_row(row):
+    kind, H, W, L, witness = row
+    name = "%s %d %d %d" % (kind, H, W, L)
+    try:
+        _, tets = decode(H, W, witness)
+    except ValueError as e:
+        return "%s: Error: %s" % (name, e)
+    return verdict(name, H, W, L, tets)
+
+
+if __name__ == "__main__":
+    if len(argv) > 2 and argv[1] == '--db':
+        db = sqlite3.connect(argv[2])
+        jobs = db.execute("SELECT kind, H, W, L, witness FROM results WHERE kind LIKE 'tiling%' "
+                          "AND status = 'SAT' AND witness IS NOT NULL ORDER BY kind, H, W, L").fetchall()
+        task = check_row
+    else:
+        here = os.path.dirname(os.path.abspath(__file__))
+        jobs = argv[1:] or sorted(glob.glob(os.path.join(here, os.pardir, 'Graphics', '*.eps')))
+        task = check
+    with Pool() as pool:
+        for result in pool.imap(task, jobs):
+            print(result)
@@ -0,0 +1,247 @@
+# Benchmarks the generators and solvers on a ladder of instances whose answers we know, the
+# extremal tilings in Graphics/ and the colorings in 2DvdW/, so that a change that makes the
+# large boards slower shows up before it is used on a long run.
+#
+# Each instance is run through its program (build_and_solve_SAT.py or 2dvdW.py) with --stats
+# (see runstats.py) and an empty formula cache, so that every phase is timed: building the Ts,
+# generating the clauses, saving them to the cache, writing them out as DIMACS, loading them
+# into the solver, and solving. The tiling or coloring found is then checked independently
+# (see tilings.py and longest.py), and that is timed too. The peak memory, the number of
+# clauses of each family and the solver's statistics come from the same records.
+#
+# Results are appended to bench.jsonl at the top of the repository, one line per instance and
+# run, tagged with the git commit ("+" after it if the tree had uncommitted changes), so that
+# the runs on different commits can be compared.
+#
+# Usage: python3 bench.py [--ladder quick|default|large] [--repeat N] [--time S] [--seeded]
+#   benchmarks the instances of the ladder (default: default) on the current tree, each N
+#   times (default 1), giving each solve S seconds (default 600). With --seeded, each solver
+#   starts from the known answer (--seed, see tilings.py and seed.py), which is how the large
+#   boards can be solved in seconds rather than hours; it measures everything but the search.
+# Usage: python3 bench.py 24x40-3 2D-12x56-4 ...
+#   benchmarks the given instances: HxW-L is the tiling of Graphics/HxW-L.eps, and 2D-HxW-L
+#   the coloring of 2DvdW/2D-HxW-L.txt
+# Usage: python3 bench.py compare [OLD [NEW]]
+#   compares two commits (by default the last two benchmarked), instance by instance and phase
+#   by phase, using the fastest run of each. Phases more than 25% (and 0.05 seconds) slower,
+#   and clause counts that changed, are marked.
+
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from sys import argv
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+RESULTS = os.path.join(ROOT, 'bench.jsonl')
+sys.path.append(os.path.join(ROOT, 'SATgenerators'))
+sys.path.append(os.path.join(ROOT, '2DvdW'))
+from tilings import decode, longest_ap
+from longest import longest_mono_AP
+
+SCRIPTS = {
+    'tiling': os.path.join(ROOT, 'SATgenerators', 'build_and_solve_SAT.py'),
+    'coloring': os.path.join(ROOT, '2DvdW', '2dvdW.py'),
+}
+
+# The ladders, from small boards to large ones. Unseeded, quick takes seconds and default about
+# a minute, but the solves of large are long (44x68-3 and 2D-20x32-4 ran past 5 minutes, and
+# 32x100-3 and 2D-12x56-4 past 15), so large is meant for --seeded or --time.
+LADDERS = {
+    'quick': ['16x36-3', '24x40-3', '2D-7x10-3', '2D-6x15-3', '2D-9x9-3'],
+    'default': ['12x32-2', '16x36-3', '24x40-3', '16x64-3', '2D-7x10-3', '2D-6x15-3', '2D-9x9-3', '2D-4x16-3'],
+    'large': ['24x40-3', '44x68-3', '32x100-3', '2D-20x32-4', '2D-12x56-4'],
+}
+
+SLOWER = 1.25  # A phase is marked when it takes this many times as long as before
+NOISE = 0.05  # and at least this many seconds more
+
+
+# The kind, H, W and L of an instance name, and the file with its known answer
+def parse_instance(name):
+    m = re.fullmatch(r'(2D-)?(\d+)x(\d+)-(\d+)', name)
+    if not m:
+        raise ValueError("Instances look like 24x40-3 (tilings) or 2D-12x56-4 (colorings): " + name)
+    kind = 'coloring' if m.group(1) else 'tiling'
+    H, W, L = map(int, m.group(2, 3, 4))
+    known = (os.path.join(ROOT, '2DvdW', name + '.txt') if kind == 'coloring'
+             else os.path.join(ROOT, 'Graphics', name + '.eps'))
+    if not os.path.exists(known):
+        raise ValueError("No known answer for " + name + " (" + known + ")")
+    return kind, H, W, L, known
+
+
+# The commit of the tree, with "+" if it has uncommitted changes
+def commit():
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return head + ('+' if dirty else '')
+
+
+# Run the program for an instance in the directory work, with extra arguments.
+# Returns its output lines and the record it wrote with --stats.
+def run_program(kind, H, W, L, work, seconds, extra):
+    stats = os.path.join(work, 'stats.jsonl')
+    if os.path.exists(stats):
+        os.remove(stats)
+    env = dict(os.environ, SAT_CACHE_DIR=os.path.join(work, 'cache'))
+    run = subprocess.run([sys.executable, SCRIPTS[kind], str(H), str(W), str(L), '--time', str(seconds),
+                          '--stats', stats] + extra, cwd=work, env=env, capture_output=True, text=True)
+    if run.returncode != 0 or not os.path.exists(stats):
+        raise RuntimeError(run.stderr[-2000:] or run.stdout[-2000:])
+    with open(stats) as f:
+        return run.stdout.splitlines(), json.loads(f.readline())
+
+
+# The solution in the output of the program, after its "H W L" line (L may be smaller than asked)
+def witness(kind, H, W, lines):
+    for k, line in enumerate(lines):
+        if re.fullmatch(r'%d %d \d+' % (H, W), line):
+            return lines[k+1] if kind == 'tiling' else lines[k+1:k+1+H]
+    return None
+
+
+# Whether a solution really has no AP longer than L, checked without the SAT formulas
+def verify(kind, H, W, L, solution):
+    if kind == 'tiling':
+        try:
+            return longest_ap(H, W, decode(H, W, solution)[1]) <= L
+        except ValueError:
+            return False
+    board = np.array([[c == '*' for c in row.split()] for row in solution])
+    return longest_mono_AP(board) <= L
+
+
+# Benchmark one instance, and return its result line
+def bench(name, seconds, seeded):
+    kind, H, W, L, known = parse_instance(name)
+    seed = ['--seed', known] if seeded else []
+    start = time.time()
+    with tempfile.TemporaryDirectory() as work:
+        dimacs = ['--dimacs', os.path.join(work, 'formula.cnf')]
+        if kind == 'tiling':
+            # One run does it all: the formula is built, cached, written out, loaded and solved
+            lines, record = run_program(kind, H, W, L, work, seconds, dimacs + seed)
+            records = [record]
+        else:
+            # 2dvdW.py only writes the formula with --dimacs, so the solve is a second run
+            _, written = run_program(kind, H, W, L, work, seconds, dimacs + ['--no-cache'])
+            lines, record = run_program(kind, H, W, L, work, seconds, ['--no-cache'] + seed)
+            records = [written, record]
+    phases = {}
+    for r in records:
+        for phase, values in r['phases'].items():
+            phases[phase] = values['seconds']
+    solution = witness(kind, H, W, lines)
+    verified = None
+    if solution is not None:
+        checked = time.time()
+        verified = verify(kind, H, W, L, solution)
+        phases['verify'] = round(time.time() - checked, 4)
+    return {'commit': COMMIT, 'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'host': socket.gethostname(),
+            'instance': name, 'kind': kind, 'H': H, 'W': W, 'L': L, 'seeded': seeded, 'status': record['result'],
+            'verified': verified, 'seconds': round(time.time() - start, 4), 'phases': phases,
+            'peak_rss_mb': max(r['peak_rss_mb'] for r in records), 'clauses': record['clauses'],
+            'solver': record['solver']}
+
+
+def load_results(path=RESULTS):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# For one commit, the fastest run of each instance: the least time of each phase, and the rest
+# of the record from its first run. Seeded runs are kept apart, as "24x40-3 seeded".
+def best_runs(results, commit):
+    best = {}
+    for r in results:
+        if r['commit'] != commit: continue
+        name = r['instance'] + (' seeded' if r.get('seeded') else '')
+        if name not in best:
+            best[name] = dict(r, phases=dict(r['phases']))
+            continue
+        b = best[name]
+        for phase, seconds in r['phases'].items():
+            b['phases'][phase] = min(seconds, b['phases'].get(phase, seconds))
+        b['seconds'] = min(b['seconds'], r['seconds'])
+        b['peak_rss_mb'] = min(b['peak_rss_mb'], r['peak_rss_mb'])
+    return best
+
+
+def compare(results, old, new):
+    before, after = best_runs(results, old), best_runs(results, new)
+    print("%-19s %-10s %10s %10s %7s" % ("instance", "phase", old, new, "ratio"))
+    for name in sorted(set(before) & set(after), key=lambda n: (after[n]['kind'], after[n]['H'] * after[n]['W'])):
+        b, a = before[name], after[name]
+        rows = [(phase, b['phases'][phase], a['phases'][phase])
+                for phase in a['phases'] if phase in b['phases']]
+        rows += [('total', b['seconds'], a['seconds']), ('peak MB', b['peak_rss_mb'], a['peak_rss_mb'])]
+        for phase, x, y in rows:
+            ratio = y / x if x else float('inf') if y else 1.0
+            mark = "  SLOWER" if phase != 'peak MB' and ratio > SLOWER and y - x > NOISE else ""
+            if phase == 'peak MB' and ratio > SLOWER: mark = "  LARGER"
+            print("%-19s %-10s %10.3f %10.3f %7.2f%s" % (name, phase, x, y, ratio, mark))
+        if a['status'] != b['status'] or a['verified'] != b['verified']:
+            print("%-19s status     %s -> %s, verified %s -> %s" % (name, b['status'], a['status'], b['verified'], a['verified']))
+        for family in sorted(set(a['clauses']) | set(b['clauses'])):
+            if a['clauses'].get(family) != b['clauses'].get(family):
+                print("%-19s clauses    %s: %s -> %s  CHANGED" % (name, family, b['clauses'].get(family), a['clauses'].get(family)))
+    missing = sorted(set(before) ^ set(after))
+    if missing:
+        print("Only on one commit:", " ".join(missing))
+
+
+if __name__ == "__main__":
+    if len(argv) > 1 and argv[1] == 'compare':
+        results = load_results()
+        commits = list(dict.fromkeys(r['commit'] for r in results))  # In the order first run
+        chosen = argv[2:4]
+        if len(chosen) == 0:
+            chosen = commits[-2:]
+        elif len(chosen) == 1:
+            chosen = chosen + commits[-1:]
+        if len(chosen) < 2:
+            print("Benchmark at least two commits first")
+            exit(1)
+        compare(results, *chosen)
+        exit(0)
+
+    SEEDED = '--seeded' in argv
+    if SEEDED: argv.remove('--seeded')
+    options = {'--ladder': 'default', '--repeat': '1', '--time': '600'}
+    for name in options:
+        if name in argv:
+            k = argv.index(name)
+            options[name] = argv[k+1]
+            del argv[k:k+2]
+    instances = argv[1:] or LADDERS[options['--ladder']]
+    try:
+        for name in instances:
+            parse_instance(name)  # Check them all before starting
+    except ValueError as e:
+        print(e)
+        exit(1)
+
+    COMMIT = commit()
+    print("Commit", COMMIT)
+    print("%-12s %-8s %8s %8s  %s" % ("instance", "status", "seconds", "peak MB", "phases"))
+    for _ in range(int(options['--repeat'])):
+        for name in instances:
+            result = bench(name, options['--time'], SEEDED)
+            with open(RESULTS, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+            print("%-12s %-8s %8.2f %8.1f  %s%s" % (name, result['status'], result['seconds'], result['peak_rss_mb'],
+                  " ".join("%s %.2f" % item for item in result['phases'].items()),
+                  "" if result['verified'] is not False else "  NOT VERIFIED"))
@@ -0,0 +1,121 @@
+# Solve budgets and checkpoints, so that long runs can be limited, stopped and resumed.
+#
+# A Budget limits each solve by wall-clock time (for the whole run), and by conflicts or
+# propagations (for each call), using pysat's solve_limited and interrupt. A solve that runs
+# out of budget answers None, which the programs print as "Unknown". A SIGTERM, as sent by a
+# batch scheduler, interrupts the solve in the same way, so the program can save its progress
+# and stop. The solver runs in a helper thread while the main thread watches the clock and
+# the signal, since Python does not run signal handlers while the main thread is inside it.
+# The SIGTERM handler is only installed while a solve runs (or inside watching), and the
+# previous handler is put back after, so a SIGTERM at any other time does what it did before.
+#
+# A Checkpoint is a small JSON file holding what a run has learned so far (for example, the
+# values of L already refuted), together with what identifies the run: the program, its
+# arguments, and the key of its formula in the cache (see cache.py). A run given the same
+# checkpoint file picks up from there; a checkpoint from another run is ignored.
+# What is saved is what the searches over L, W or C have settled, and the answer once there is
+# one. A run with fixed H, W and L is a single solve, and pysat cannot save a solver's partial
+# work, so such a run that is stopped early starts over when it is run again.
+#
+# Options, taken out of argv by Budget.from_argv and Checkpoint.path_from_argv:
+#   --time S            stop after S seconds in all
+#   --conflicts N       stop each solve after N conflicts
+#   --propagations N    stop each solve after N propagations
+#   --checkpoint FILE   save progress to FILE, and resume from it if it is there
+
+import json
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Budget:
+    def __init__(self, seconds=None, conflicts=None, propagations=None):
+        self.deadline = time.time() + seconds if seconds else None
+        self.conflicts = conflicts
+        self.propagations = propagations
+        self.stopped = False  # Set when a SIGTERM arrives
+
+    @staticmethod
+    def from_argv(argv):
+        limits = {'--time': None, '--conflicts': None, '--propagations': None}
+        for name in limits:
+            if name in argv:
+                k = argv.index(name)
+                limits[name] = float(argv[k+1]) if name == '--time' else int(argv[k+1])
+                del argv[k:k+2]
+        return Budget(limits['--time'], limits['--conflicts'], limits['--propagations'])
+
+    def stop(self, signum, frame):
+        self.stopped = True
+
+    # A SIGTERM inside the with block stops the run rather than killing it
+    @contextmanager
+    def watching(self):
+        previous = signal.signal(signal.SIGTERM, self.stop)
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+    # Whether the run may go on
+    def left(self):
+        return not self.stopped and (self.deadline is None or time.time() < self.deadline)
+
+    # Solve, and return True, False, or None if the budget ran out or the run was stopped
+    def solve(self, solver, assumptions=[]):
+        if not self.left():
+            return None
+        if self.conflicts:
+            solver.conf_budget(self.conflicts)
+        if self.propagations:
+            solver.prop_budget(self.propagations)
+        answer = []
+        thread = threading.Thread(target=lambda: answer.append(
+            solver.solve_limited(assumptions=assumptions, expect_interrupt=True)))
+        with self.watching():
+            thread.start()
+            while thread.is_alive():
+                thread.join(0.1)
+                if thread.is_alive() and not self.left():
+                    solver.interrupt()
+        if answer[0] is None:
+            solver.clear_interrupt()
+        return answer[0]
+
+
+class Checkpoint:
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run  # What identifies the run: program, arguments and cache key
+
+    # The path given with --checkpoint, or None
+    @staticmethod
+    def path_from_argv(argv):
+        if '--checkpoint' not in argv:
+            return None
+        k = argv.index('--checkpoint')
+        path = argv[k+1]
+        del argv[k:k+2]
+        return path
+
+    # The progress saved by the same run, or None
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved['run'] != self.run:
+            print("Checkpoint", self.path, "is for another run, starting over")
+            return None
+        return saved['progress']
+
+    # Save the progress, replacing the file at once so a kill never leaves half of it
+    def save(self, progress):
+        if not self.path:
+            return
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'run': self.run, 'progress': progress}, f)
+        os.replace(self.path + '.tmp', self.path)
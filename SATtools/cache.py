@@ -0,0 +1,115 @@
+# An on-disk cache of generated formulas, so that running the same size again, with another
+# solver or other assumptions, does not regenerate all the Ts, maps and AP clauses.
+#
+# Each formula is one compressed .npz file holding its clauses in a flat layout: `lits`, all
+# the literals one clause after another, and `offsets`, where clause k is
+# lits[offsets[k]:offsets[k+1]]. For the tiling formulas the file also holds all_tets, as the
+# arrays `tet_i`, `tet_j` and `tet_dir`. The index maps follow from the order of all_tets
+# (tet number k+1 is all_tets[k]), so they are rebuilt rather than stored.
+#
+# Files are named by a hash of the generator kind, H, W, L, the symmetry mode and the code
+# version, which is a hash of the source files that generate the formula. So editing a
+# generator makes its old formulas unreachable, and they age out of the cache.
+#
+# The cache lives in $SAT_CACHE_DIR (default ~/.cache/fellerhochberg), and is kept under
+# $SAT_CACHE_MB megabytes (default 4096) by deleting the least recently used files.
+
+import hashlib
+import os
+import numpy as np
+
+CACHE_DIR = os.environ.get('SAT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fellerhochberg'))
+MAX_BYTES = int(os.environ.get('SAT_CACHE_MB', 4096)) << 20
+
+
+# A hash of the contents of the source files, which changes whenever the generator changes
+def code_version(sources):
+    h = hashlib.sha1()
+    for path in sources:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def cache_path(kind, H, W, L, symmetry, sources):
+    key = repr((kind, H, W, L, symmetry, code_version(sources)))
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + '.npz')
+
+
+# Clauses (lists of ints) to the flat lits / offsets layout
+def pack_clauses(clauses):
+    lengths = np.fromiter((len(c) for c in clauses), dtype=np.int64, count=len(clauses))
+    offsets = np.zeros(len(clauses) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    lits = np.fromiter((x for c in clauses for x in c), dtype=np.int32, count=int(offsets[-1]))
+    return lits, offsets
+
+
+# And back to a list of clauses
+def unpack_clauses(lits, offsets):
+    flat = lits.tolist()
+    bounds = offsets.tolist()
+    return [flat[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+# Returns (lits, offsets, all_tets) for the formula, all_tets being None if none was stored,
+# or None if the formula is not in the cache
+def load_arrays(kind, H, W, L, symmetry, sources):
+    path = cache_path(kind, H, W, L, symmetry, sources)
+    try:
+        with np.load(path) as data:
+            lits, offsets = data['lits'], data['offsets']
+            all_tets = None
+            if 'tet_i' in data:
+                all_tets = list(zip(data['tet_i'].tolist(), data['tet_j'].tolist(), data['tet_dir'].tolist()))
+    except (OSError, KeyError, ValueError):
+        return None
+    os.utime(path)  # Mark it as recently used
+    return lits, offsets, all_tets
+
+
+# Returns (clauses, all_tets), as load_arrays but with the clauses as lists, or None
+def load_formula(kind, H, W, L, symmetry, sources):
+    found = load_arrays(kind, H, W, L, symmetry, sources)
+    if found is None:
+        return None
+    lits, offsets, all_tets = found
+    return unpack_clauses(lits, offsets), all_tets
+
+
+def save_arrays(kind, H, W, L, symmetry, sources, lits, offsets, all_tets=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = cache_path(kind, H, W, L, symmetry, sources)
+    arrays = {'lits': lits, 'offsets': offsets}
+    if all_tets is not None:
+        arrays['tet_i'] = np.array([t[0] for t in all_tets], dtype=np.int32)
+        arrays['tet_j'] = np.array([t[1] for t in all_tets], dtype=np.int32)
+        arrays['tet_dir'] = np.array([t[2] for t in all_tets], dtype='U1')
+    # Write under a temporary name, so that a reader never sees half a file
+    temp = path[:-4] + '.%d.tmp.npz' % os.getpid()
+    np.savez_compressed(temp, **arrays)
+    os.replace(temp, path)
+    evict()
+
+
+def save_formula(kind, H, W, L, symmetry, sources, clauses, all_tets=None):
+    lits, offsets = pack_clauses(clauses)
+    save_arrays(kind, H, W, L, symmetry, sources, lits, offsets, all_tets)
+
+
+# Delete the least recently used formulas until the cache fits in max_bytes
+def evict(max_bytes=MAX_BYTES):
+    files = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+            st = os.stat(path)
+            files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes: break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
@@ -0,0 +1,88 @@
+# Enumerates all the solutions of a formula, one per orbit under the symmetries of the board,
+# for counting the extremal tilings (SATgenerators/count_tilings.py) and colorings
+# (2DvdW/count_colorings.py) of a given size.
+#
+# A solution is the set of its true variables among 1..n, the Ts used or the cells of one color.
+# Each time the solver finds one, every image of it under the symmetries is blocked, so each
+# orbit is found once, and the search goes on until the formula becomes unsatisfiable.
+#
+# The work is split into cubes, lists of assumptions on a few variables, solved by separate
+# worker processes. An orbit can meet several cubes, so each worker finds it, but only the
+# worker whose cube holds the orbit's canonical solution (the least one, as a sorted tuple of
+# variables) reports it. Every orbit is then reported exactly once.
+
+import time
+from multiprocessing import Process, Queue
+from pysat.solvers import Glucose4
+
+
+# The solutions of the orbit of a solution, as frozensets
+def orbit(solution, symmetries):
+    return set(sym(solution) for sym in symmetries) | {solution}
+
+
+# The least solution in an orbit
+def canonical(images):
+    return min(images, key=lambda s: tuple(sorted(s)))
+
+
+# Whether a solution agrees with the assumptions of a cube
+def in_cube(solution, cube):
+    return all((abs(lit) in solution) == (lit > 0) for lit in cube)
+
+
+# Runs in a worker process: take cubes from tasks until there are none left, and put
+# ('orbit', solution, size) for each orbit it reports, and ('done', cube, found, seconds)
+# at the end of each cube, on results
+def run_worker(clauses, n, symmetries, block, tasks, results):
+    while True:
+        cube = tasks.get()
+        if cube is None:
+            return
+        start, found = time.time(), 0
+        with Glucose4(bootstrap_with=clauses) as solver:
+            while solver.solve(assumptions=cube):
+                solution = frozenset(v for v in solver.get_model()[:n] if v > 0)
+                images = orbit(solution, symmetries)
+                for image in images:
+                    solver.add_clause(block(image))
+                found += 1
+                rep = canonical(images)
+                if in_cube(rep, cube):
+                    results.put(('orbit', rep, len(images)))
+        results.put(('done', cube, found, time.time() - start))
+
+
+# Enumerate the orbits of solutions of the clauses over variables 1..n.
+# symmetries are maps of solutions (frozensets of true variables) to solutions, other than the
+# identity. block(solution) is a clause that excludes that solution. on_orbit(solution, size)
+# is called for each orbit, with its canonical solution, as soon as it is found.
+# Returns the number of orbits, and the number of solutions.
+def enumerate_orbits(clauses, n, symmetries, block, on_orbit, cubes=[[]], workers=1, verbose=False):
+    tasks, results = Queue(), Queue()
+    for cube in cubes:
+        tasks.put(cube)
+    for _ in range(workers):
+        tasks.put(None)
+    procs = [Process(target=run_worker, args=(clauses, n, symmetries, block, tasks, results), daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    orbits, solutions, done = 0, 0, 0
+    try:
+        while done < len(cubes):
+            message = results.get()
+            if message[0] == 'orbit':
+                orbits += 1
+                solutions += message[2]
+                on_orbit(message[1], message[2])
+            else:
+                done += 1
+                if verbose:
+                    print("Cube %d/%d %s: %d orbits met, %.1f seconds" % (done, len(cubes), message[1], message[2], message[3]))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+    return orbits, solutions
@@ -0,0 +1,56 @@
+# The command-line options shared by the solving programs, build_and_solve_SAT*.py and 2dvdW*.py.
+#
+# As everywhere else, an option is taken out of argv when it is read, so what is left is the
+# board (H W L) and the program's own arguments. solver_options reads the options that every
+# solving program takes:
+#   --stats FILE, --profile DIR   record each phase of the run (see runstats.py)
+#   --portfolio                   race several pysat engines on each formula (see portfolio.py)
+#   --no-cache                    do not use the cache of formulas (see cache.py)
+#   --seed FILE                   start the solver from the solution in FILE, for a nearby board
+#   --time S, --conflicts N, --propagations N, --checkpoint FILE   budgets and checkpoints
+#                                 for long runs (see budget.py). A run stopped by its budget or
+#                                 by SIGTERM prints "Unknown", and with --checkpoint, a rerun
+#                                 picks up where it stopped. A run with fixed H, W and L is
+#                                 a single solve, and starts over.
+# The options of only some of the programs (--dimacs FILE, --encoding NAME, --symmetry MODE, ...)
+# are read by the programs themselves, with take_flag and take_value.
+
+from collections import namedtuple
+from budget import Budget, Checkpoint
+from runstats import RunStats
+
+SolverOptions = namedtuple('SolverOptions', ['run', 'portfolio', 'use_cache', 'seed', 'budget', 'checkpoint'])
+
+
+# Take the flag name out of argv, and return whether it was there
+def take_flag(argv, name):
+    if name not in argv:
+        return False
+    argv.remove(name)
+    return True
+
+
+# Take "name VALUE" out of argv, and return VALUE, or default if the option is not there.
+# A VALUE that is not one of choices (if given) is an error.
+def take_value(argv, name, default=None, choices=None):
+    if name not in argv:
+        return default
+    k = argv.index(name)
+    value = argv[k+1]
+    del argv[k:k+2]
+    if choices is not None and value not in choices:
+        print("Unknown", name[2:], value, "- choose from", ", ".join(choices))
+        exit(1)
+    return value
+
+
+# The options above, as (run, portfolio, use_cache, seed, budget, checkpoint). The RunStats
+# comes first, so that its record keeps the whole command line.
+def solver_options(argv):
+    run = RunStats.from_argv(argv)
+    portfolio = take_flag(argv, '--portfolio')
+    use_cache = not take_flag(argv, '--no-cache')
+    seed = take_value(argv, '--seed')
+    budget = Budget.from_argv(argv)
+    checkpoint = Checkpoint.path_from_argv(argv)
+    return SolverOptions(run, portfolio, use_cache, seed, budget, checkpoint)
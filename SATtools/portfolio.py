@@ -0,0 +1,185 @@
+# Solves one formula with several pysat engines at once, and keeps the first answer.
+#
+# No single backend is fastest on all of our instances, so rather than guessing we start
+# every engine in ENGINES in its own process, take whichever answers first, and kill the
+# rest. Engines listed with a seed get their clauses in a shuffled order, which is often
+# enough to send the same solver down a very different search.
+#
+# The Portfolio class has the add_clause / append_formula / solve / get_model interface of
+# the pysat solvers (and set_phases, solve_limited with its budgets and interrupt, see
+# budget.py, and accum_stats, which adds up the statistics of the winning engines), so the
+# generator scripts can use it in place of Glucose4(). Each solve appends a line to LOG_FILE
+# saying which engine won, so the default can be tuned later, and a line for each engine that
+# failed, with its error. The label of the line says what was solved; programs that solve
+# several instances with one Portfolio (the L = 0 mode, the sweeps) change it for each solve.
+#
+# The engines are not incremental: every solve starts them afresh, in new processes, with all
+# the clauses so far. So in the L = 0 mode and the sweeps, each round pays for loading the
+# whole formula again, and nothing learned in one round carries over to the next, unlike a
+# single pysat solver. The portfolio pays off when a single hard solve dominates the run.
+
+import os
+import queue
+import random
+import signal
+import sys
+import threading
+import time
+from multiprocessing import Process, Queue
+from pysat.solvers import Solver
+from cache import CACHE_DIR
+
+# (pysat solver name, seed for shuffling the clauses, or None to keep them in order)
+ENGINES = [
+    ('cadical153', None),
+    ('maplechrono', None),
+    ('lingeling', None),
+    ('glucose3', None),
+    ('glucose4', None),
+    ('glucose4', 1),
+    ('cadical153', 2),
+]
+
+# Kept next to the formula cache (see cache.py) unless $SAT_PORTFOLIO_LOG says otherwise
+LOG_FILE = os.environ.get('SAT_PORTFOLIO_LOG', os.path.join(CACHE_DIR, 'portfolio-log.txt'))
+
+
+# Runs in a worker process: solve with one engine and report (name, seed, answer, model, stats).
+# budgets are the (conflicts, propagations) limits, either None; an engine that runs out
+# answers None, as one that fails does, and a failed engine reports its error as stats['error'].
+def run_engine(name, seed, clauses, assumptions, phases, budgets, results):
+    # The process is forked with the parent's signal handlers, and a Budget's SIGTERM handler
+    # (see budget.py) would stop terminate() from killing the engines that lost
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        if seed is not None:
+            clauses = list(clauses)
+            random.Random(seed).shuffle(clauses)
+        with Solver(name=name, bootstrap_with=clauses) as s:
+            if phases:
+                s.set_phases(phases)
+            conflicts, propagations = budgets
+            if conflicts or propagations:
+                if conflicts: s.conf_budget(conflicts)
+                if propagations: s.prop_budget(propagations)
+                answer = s.solve_limited(assumptions=assumptions)
+            else:
+                answer = s.solve(assumptions=assumptions)
+            results.put((name, seed, answer, s.get_model() if answer else None, s.accum_stats()))
+    except Exception as e:
+        # This engine failed; let the others decide
+        results.put((name, seed, None, None, {'error': '%s: %s' % (type(e).__name__, e)}))
+
+
+# Solve the clauses with every engine, and return (name, seed, answer, model, stats) for the first to finish.
+# phases are the initial phases of variables, as literals (see set_phases in pysat).
+# The engines are stopped early, with answer None, once the threading.Event stop is set.
+# The answer is also None if every engine ran out of budget or failed.
+# Engines that fail are reported on stderr, and appended to the list failures as (name, seed, error).
+def solve_portfolio(clauses, assumptions=[], engines=ENGINES, phases=[], budgets=(None, None), stop=None,
+                    failures=None):
+    results = Queue()
+    workers = [Process(target=run_engine, args=(name, seed, clauses, assumptions, phases, budgets, results), daemon=True)
+               for name, seed in engines]
+    for w in workers:
+        w.start()
+    try:
+        finished = 0
+        while finished < len(workers):
+            try:
+                name, seed, answer, model, stats = results.get(timeout=0.1)
+            except queue.Empty:
+                if stop is not None and stop.is_set():
+                    return None, None, None, None, None
+                continue
+            finished += 1
+            if stats and 'error' in stats:
+                print("portfolio: %s (seed %s) failed: %s" % (name, seed, stats['error']), file=sys.stderr)
+                if failures is not None:
+                    failures.append((name, seed, stats['error']))
+            if answer is not None:
+                return name, seed, answer, model, stats
+        return None, None, None, None, None  # Every engine failed, or ran out of budget
+    finally:
+        for w in workers:
+            w.terminate()
+        for w in workers:
+            w.join()
+
+
+# The word for the log: SAT or UNSAT; INTERRUPTED if stopped by interrupt (a SIGTERM or the time
+# budget, see budget.py); FAILED if every engine failed; UNKNOWN if they ran out of budget
+def outcome(answer, stop, failures, engines):
+    if answer is not None:
+        return 'SAT' if answer else 'UNSAT'
+    if stop.is_set():
+        return 'INTERRUPTED'
+    if len(failures) == engines:
+        return 'FAILED'
+    return 'UNKNOWN'
+
+
+# A stand-in for a pysat solver that collects the clauses, and solves them with the portfolio.
+# label is written to the log with each result, usually "H W L" for the instance being solved.
+class Portfolio:
+    def __init__(self, label, engines=ENGINES, log=LOG_FILE):
+        self.label = label
+        self.engines = engines
+        self.log = log
+        self.clauses = []
+        self.phases = []
+        self.budgets = (None, None)
+        self.stop = threading.Event()
+        self.model = None
+        self.stats = {}
+
+    def add_clause(self, clause):
+        self.clauses.append(list(clause))
+
+    def append_formula(self, clauses):
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def set_phases(self, literals):
+        self.phases = list(literals)
+
+    def conf_budget(self, budget):
+        self.budgets = (budget, self.budgets[1])
+
+    def prop_budget(self, budget):
+        self.budgets = (self.budgets[0], budget)
+
+    def interrupt(self):
+        self.stop.set()
+
+    def clear_interrupt(self):
+        self.stop.clear()
+
+    def solve(self, assumptions=[]):
+        return self.solve_limited(assumptions)
+
+    # As solve, but within the budgets set, and stopped by interrupt: None if it gave up
+    def solve_limited(self, assumptions=[], expect_interrupt=False):
+        start = time.time()
+        failures = []
+        name, seed, answer, self.model, stats = solve_portfolio(self.clauses, assumptions, self.engines, self.phases,
+                                                                self.budgets, self.stop, failures)
+        for key, n in (stats or {}).items():
+            self.stats[key] = self.stats.get(key, 0) + n
+        if self.log:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log)), exist_ok=True)
+            with open(self.log, 'a') as f:
+                for failed, failed_seed, error in failures:
+                    f.write("%s %s %s ERROR %s\n" % (self.label, failed, failed_seed, error))
+                result = outcome(answer, self.stop, failures, len(self.engines))
+                f.write("%s %s %s %s %.2f\n" % (self.label, name, seed, result, time.time() - start))
+        return answer
+
+    def accum_stats(self):
+        return self.stats
+
+    def get_model(self):
+        return self.model
+
+    def delete(self):
+        self.clauses = []
@@ -0,0 +1,116 @@
+# Per-phase instrumentation of a run, to see where a slow run spends its time and memory.
+#
+# A run is split into named phases (building the Ts, generating the clauses, loading them into
+# the solver, solving, ...). For each phase we record its wall time and the peak resident set
+# size of the process when it ends. The peak is taken from getrusage, so it includes the
+# solver's own memory, which tracemalloc cannot see. It only grows, so a phase's share is how
+# much it raised the peak. A phase entered several times (one solve per L, say) adds up its
+# times. The record also has the number of clauses of each family, the solver's statistics
+# (conflicts, decisions, propagations and restarts, from pysat's accum_stats), and the result.
+#
+# Each run appends its record as one JSON line to the stats file, so the records of many runs
+# (from sweep.py, or a batch of jobs) can be put side by side, for example with
+#   python3 -c "import json; [print(r['command'], r['phases']) for r in map(json.loads, open('stats.jsonl'))]"
+#
+# Options, taken out of argv by RunStats.from_argv:
+#   --stats FILE     append the record of the run to FILE (default $SAT_STATS_FILE, or none)
+#   --profile DIR    also run each phase under cProfile, and write DIR/PROGRAM-PHASE.prof,
+#                    to be read with python3 -m pstats, or snakeviz
+
+import cProfile
+import json
+import os
+import resource
+import socket
+import sys
+import time
+from contextlib import contextmanager
+
+STATS_FILE = os.environ.get('SAT_STATS_FILE')
+
+
+# The peak resident set size of this process so far, in megabytes
+def peak_rss_mb():
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)  # Bytes on macOS
+
+
+class RunStats:
+    def __init__(self, program, command, path=STATS_FILE, profile_dir=None):
+        self.program = os.path.splitext(os.path.basename(program))[0]
+        self.path = path
+        self.profile_dir = profile_dir
+        self.profilers = {}  # One per phase, so a phase entered again adds to its profile
+        self.start = time.perf_counter()
+        self.record = {'program': os.path.basename(program), 'command': command, 'host': socket.gethostname(),
+                       'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'phases': {}, 'clauses': {},
+                       'solver': {}, 'result': None}
+
+    # Takes --stats and --profile out of argv. The record keeps the whole command line.
+    @staticmethod
+    def from_argv(argv):
+        command = argv[1:]
+        path, profile_dir = STATS_FILE, None
+        if '--stats' in argv:
+            k = argv.index('--stats')
+            path = argv[k+1]
+            del argv[k:k+2]
+        if '--profile' in argv:
+            k = argv.index('--profile')
+            profile_dir = argv[k+1]
+            del argv[k:k+2]
+        return RunStats(argv[0], command, path, profile_dir)
+
+    # with run.phase('solve'): ...
+    @contextmanager
+    def phase(self, name):
+        profiler = None
+        if self.profile_dir:
+            profiler = self.profilers.setdefault(name, cProfile.Profile())
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+            phase = self.record['phases'].setdefault(name, {'seconds': 0.0})
+            phase['seconds'] = round(phase['seconds'] + seconds, 4)
+            phase['peak_rss_mb'] = peak_rss_mb()
+
+    # Count the clauses of a family as they go by, for formulas that are never held in full
+    def counted(self, family, clauses):
+        clauses_seen = self.record['clauses']
+        clauses_seen.setdefault(family, 0)
+        for clause in clauses:
+            clauses_seen[family] += 1
+            yield clause
+
+    # Add to the count of clauses of each family, given as a dict
+    def add_clauses(self, counts):
+        for family, n in counts.items():
+            self.record['clauses'][family] = self.record['clauses'].get(family, 0) + int(n)
+
+    # Add the statistics of a solver, before it is deleted
+    def add_solver(self, solver):
+        try:
+            stats = solver.accum_stats()
+        except (AttributeError, NotImplementedError):
+            return
+        for key, n in (stats or {}).items():
+            self.record['solver'][key] = self.record['solver'].get(key, 0) + n
+
+    # Write the record, with the result and anything else given (H, W, L, ...), and the profiles
+    def write(self, result, **fields):
+        self.record['result'] = result
+        self.record.update(fields)
+        self.record['seconds'] = round(time.perf_counter() - self.start, 4)
+        self.record['peak_rss_mb'] = peak_rss_mb()
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(self.record) + '\n')
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            for name, profiler in self.profilers.items():
+                profiler.dump_stats(os.path.join(self.profile_dir, f'{self.program}-{name}.prof'))
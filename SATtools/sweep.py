@@ -0,0 +1,289 @@
+# Runs a grid of (H, W, L) instances through the solving programs, and keeps every result
+# in a SQLite store, so that nothing has to be solved twice.
+#
+# Usage: python3 sweep.py coloring 4 10-40 3
+#   Asks, for every W from 10 to 40, whether a 4xW rectangle has a 2-coloring with no
+#   monochromatic AP longer than 3, using 2DvdW/2dvdW.py.
+# Usage: python3 sweep.py tiling 20-24 20-40 2-3 --workers 8 --timeout 3600
+#   Same idea for tilings by Ts, using SATgenerators/build_and_solve_SAT.py.
+# Usage: python3 sweep.py tiling 20-24 20-40 2-3 --stats stats.jsonl
+#   Same, and each run appends its timings and solver statistics to stats.jsonl (see runstats.py).
+# Usage: python3 sweep.py show coloring
+#   Prints everything in the store for the given kind.
+#
+# On each run, colorings 2DvdW/2D-HxW-L.txt and pictures Graphics/HxW-L.eps that are not
+# yet in the store are imported. Each is checked first (see longest.py and tilings.py) and
+# recorded as SAT at the length of its own longest AP, which can be shorter than the L in its
+# name. It says nothing about shorter APs: the files are not all proven extremal.
+#
+# The programs run in a scratch directory, so the files they write (like the 2D-HxW-L.txt of
+# 2dvdW.py) stay out of the repository; their answers are read from what they print.
+#
+# Before an instance is run, we check whether its answer follows from what is already known:
+#   - a solution with no AP longer than L has no AP longer than L+1, so SAT at L gives SAT at
+#     every larger L, and UNSAT at L gives UNSAT at every smaller L
+#   - a coloring of HxW gives a coloring of every sub-rectangle, and of WxH, so for colorings
+#     SAT carries to smaller boards and UNSAT to larger ones
+#   - a symmetric solution is also a plain one
+# Pending instances are started in bisection order, so that each answer can settle as many of
+# the others as possible.
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(os.path.join(ROOT, 'SATgenerators'))
+from tilings import read_eps, longest_ap
+sys.path.append(os.path.join(ROOT, '2DvdW'))
+from longest import read_coloring, longest_mono_AP
+DATABASE = os.path.join(ROOT, 'sweep.db')
+
+# The program that answers each kind of question
+SCRIPTS = {
+    'tiling': os.path.join(ROOT, 'SATgenerators', 'build_and_solve_SAT.py'),
+    'tiling2': os.path.join(ROOT, 'SATgenerators', 'build_and_solve_SAT2.py'),
+    'tiling4': os.path.join(ROOT, 'SATgenerators', 'build_and_solve_SAT4.py'),
+    'coloring': os.path.join(ROOT, '2DvdW', '2dvdW.py'),
+    'coloring2': os.path.join(ROOT, '2DvdW', '2dvdW2.py'),
+}
+
+# The kinds whose solutions are also solutions of the given kind
+SUBKINDS = {
+    'tiling': ['tiling', 'tiling2', 'tiling4'],
+    'tiling2': ['tiling2', 'tiling4'],
+    'tiling4': ['tiling4'],
+    'coloring': ['coloring', 'coloring2'],
+    'coloring2': ['coloring2'],
+}
+GRACE = 60  # Seconds a program may take to stop after its --time budget runs out
+
+CROPPABLE = {'coloring'}                   # Every sub-rectangle of a solution is a solution
+TRANSPOSABLE = {'coloring', 'coloring2'}   # The transpose of a solution is a solution
+
+
+def open_store(path=DATABASE):
+    db = sqlite3.connect(path)
+    db.execute("""CREATE TABLE IF NOT EXISTS results (
+                      kind TEXT, H INTEGER, W INTEGER, L INTEGER,
+                      status TEXT,      -- SAT, UNSAT, TIMEOUT or ERROR
+                      witness TEXT,     -- tiling string or coloring rows when SAT, error output when ERROR
+                      seconds REAL,
+                      source TEXT,      -- 'solved', 'inferred from ...' or the imported file
+                      recorded TEXT,
+                      PRIMARY KEY (kind, H, W, L))""")
+    # The rows infer reads: definite answers, by kind and board
+    db.execute("CREATE INDEX IF NOT EXISTS answers ON results (status, kind, H, W, L)")
+    db.execute("CREATE TABLE IF NOT EXISTS imported (path TEXT PRIMARY KEY)")
+    return db
+
+
+# Record a result. A definite answer (SAT or UNSAT) is never replaced by a TIMEOUT or ERROR.
+def record(db, kind, H, W, L, status, witness=None, seconds=None, source='solved'):
+    old = db.execute("SELECT status FROM results WHERE kind=? AND H=? AND W=? AND L=?",
+                     (kind, H, W, L)).fetchone()
+    if old and old[0] in ('SAT', 'UNSAT') and status not in ('SAT', 'UNSAT'):
+        return
+    db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+               (kind, H, W, L, status, witness, seconds, source, time.strftime('%Y-%m-%d %H:%M:%S')))
+    db.commit()
+
+
+# Bring in the colorings and tiling pictures already in the repository
+def import_existing(db):
+    known = set(row[0] for row in db.execute("SELECT path FROM imported"))
+    for path in sorted(glob.glob(os.path.join(ROOT, '2DvdW', '2D-*.txt'))):
+        name = os.path.basename(path)
+        m = re.fullmatch(r'2D-(\d+)x(\d+)-(\d+)\.txt', name)
+        if not m or name in known: continue
+        try:
+            H, W, _, board = read_coloring(path)
+            if board.shape != (H, W) or not set(board.ravel()) <= {'*', '-'}:
+                raise ValueError("not a coloring of %dx%d" % (H, W))
+        except ValueError as e:
+            print("Not importing %s: %s" % (name, e), file=sys.stderr)
+            continue
+        L = longest_mono_AP(board)
+        rows = [" ".join(row) for row in board]
+        witness = "\n".join(rows)
+        record(db, 'coloring', H, W, L, 'SAT', witness, source=name)
+        if rows == [" ".join(reversed(r.split(" "))) for r in reversed(rows)]:
+            record(db, 'coloring2', H, W, L, 'SAT', witness, source=name)
+        db.execute("INSERT INTO imported VALUES (?)", (name,))
+    for path in sorted(glob.glob(os.path.join(ROOT, 'Graphics', '*.eps'))):
+        name = os.path.basename(path)
+        m = re.fullmatch(r'(\d+)x(\d+)-(\d+)\.eps', name)
+        if not m or name in known: continue
+        try:
+            H, W, tets = read_eps(path)
+        except ValueError as e:
+            print("Not importing %s: %s" % (name, e), file=sys.stderr)
+            continue
+        record(db, 'tiling', H, W, longest_ap(H, W, tets), 'SAT', source=name)
+        db.execute("INSERT INTO imported VALUES (?)", (name,))
+    db.commit()
+
+
+# Can a solution for an h x w board be had from a solution for an H x W board?
+def fits(kind, h, w, H, W):
+    if kind in CROPPABLE:
+        return (h <= H and w <= W) or (kind in TRANSPOSABLE and h <= W and w <= H)
+    return (h, w) == (H, W) or (kind in TRANSPOSABLE and (h, w) == (W, H))
+
+
+# Cut an h x w coloring out of the top left of a stored coloring, transposing it if needed
+def crop_coloring(witness, h, w):
+    board = [row.split(" ") for row in witness.split("\n")]
+    if h > len(board) or w > len(board[0]):
+        board = [list(col) for col in zip(*board)]
+    return "\n".join(" ".join(row[:w]) for row in board[:h])
+
+
+# The rows of the store that may settle (kind, H, W, L): SATs of a subkind on boards at least as
+# big (either way round) with an L no larger, and UNSATs of a superkind on boards no bigger with
+# an L no smaller. fits sorts out which of them do.
+def candidates(db, kind, H, W, L):
+    subkinds = SUBKINDS[kind]
+    superkinds = [k for k in SUBKINDS if kind in SUBKINDS[k]]
+    select = "SELECT kind, H, W, L, status, witness FROM results WHERE status = ? AND kind IN (%s) AND "
+    sat = db.execute(select % ",".join("?" * len(subkinds)) + "((H >= ? AND W >= ?) OR (H >= ? AND W >= ?)) AND L <= ?",
+                     ['SAT', *subkinds, H, W, W, H, L])
+    unsat = db.execute(select % ",".join("?" * len(superkinds)) + "((H <= ? AND W <= ?) OR (H <= ? AND W <= ?)) AND L >= ?",
+                       ['UNSAT', *superkinds, H, W, W, H, L])
+    return sat.fetchall() + unsat.fetchall()
+
+
+# Returns (status, witness, source) if the answer for (kind, H, W, L) follows from the store, else None
+def infer(db, kind, H, W, L):
+    for k, h, w, l, status, witness in candidates(db, kind, H, W, L):
+        source = 'inferred from %s %d %d %d' % (k, h, w, l)
+        if status == 'SAT' and k in SUBKINDS[kind] and l <= L and fits(kind, H, W, h, w):
+            if witness and kind in CROPPABLE | TRANSPOSABLE:
+                witness = crop_coloring(witness, H, W)
+            elif (h, w) != (H, W):
+                witness = None
+            return status, witness, source
+        if status == 'UNSAT' and kind in SUBKINDS[k] and l >= L and fits(k, h, w, H, W):
+            return status, None, source
+    return None
+
+
+# Run one instance, and return (status, witness, seconds), in a scratch directory.
+# The program gets the timeout as its own budget (--time, see budget.py) and stops cleanly,
+# answering "Unknown"; it is only killed if it has not stopped GRACE seconds later.
+def solve(kind, H, W, L, timeout, extra):
+    script = SCRIPTS[kind]
+    start = time.time()
+    budget = ['--time', str(timeout)] if timeout else []
+    try:
+        with tempfile.TemporaryDirectory(prefix='sweep-') as scratch:
+            run = subprocess.run([sys.executable, script, str(H), str(W), str(L)] + budget + extra,
+                                 cwd=scratch, capture_output=True, text=True,
+                                 timeout=timeout and timeout + GRACE)
+    except subprocess.TimeoutExpired:
+        return 'TIMEOUT', None, time.time() - start
+    seconds = time.time() - start
+    lines = run.stdout.splitlines()
+    if run.returncode == 0 and any(line.startswith("Unknown") for line in lines):
+        return 'TIMEOUT', None, seconds
+    if run.returncode == 0 and "No Solution" in lines:
+        return 'UNSAT', None, seconds
+    # The programs print the L of the solution found, which can be less than the L asked for
+    headers = [k for k, line in enumerate(lines) if re.fullmatch(r'%d %d \d+' % (H, W), line)]
+    if run.returncode == 0 and headers:
+        k = headers[0]
+        if kind.startswith('tiling'):
+            witness = lines[k+1]
+        else:
+            witness = "\n".join(lines[k+1:k+1+H])
+        return 'SAT', witness, seconds
+    return 'ERROR', run.stderr[-2000:] or run.stdout[-2000:], seconds
+
+
+# Order a list so that the middle comes first, then the middles of each half, and so on
+def bisection_order(items):
+    order, spans = [], [(0, len(items))]
+    while spans:
+        lo, hi = spans.pop(0)
+        if lo >= hi: continue
+        mid = (lo + hi) // 2
+        order.append(items[mid])
+        spans += [(lo, mid), (mid+1, hi)]
+    return order
+
+
+# Parse "7" or "3-9" into a range
+def span(text):
+    lo, _, hi = text.partition('-')
+    return range(int(lo), int(hi or lo) + 1)
+
+
+def sweep(db, kind, Hs, Ws, Ls, workers, timeout, extra, retry_timeouts):
+    cells = [(H, W, L) for H in Hs for W in Ws for L in Ls if kind != 'tiling4' or H == W]
+    pending = []
+    for H, W, L in cells:
+        row = db.execute("SELECT status FROM results WHERE kind=? AND H=? AND W=? AND L=?",
+                         (kind, H, W, L)).fetchone()
+        if row is None or row[0] == 'ERROR' or (row[0] == 'TIMEOUT' and retry_timeouts):
+            pending.append((H, W, L))
+    pending = bisection_order(pending)
+    print("%d instances, %d without an answer" % (len(cells), len(pending)))
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            while pending and len(running) < workers:
+                H, W, L = pending.pop(0)
+                known = infer(db, kind, H, W, L)
+                if known:
+                    status, witness, source = known
+                    record(db, kind, H, W, L, status, witness, 0.0, source)
+                    print(kind, H, W, L, status, source)
+                    continue
+                running[pool.submit(solve, kind, H, W, L, timeout, extra)] = (H, W, L)
+            if not running: break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                H, W, L = running.pop(future)
+                status, witness, seconds = future.result()
+                record(db, kind, H, W, L, status, witness, seconds)
+                print(kind, H, W, L, status, "%.1fs" % seconds)
+
+
+def show(db, kind):
+    for row in db.execute("SELECT H, W, L, status, seconds, source FROM results WHERE kind=? ORDER BY H, W, L", (kind,)):
+        H, W, L, status, seconds, source = row
+        print("%4d %4d %3d  %-7s %9s  %s" % (H, W, L, status, "" if seconds is None else "%.1fs" % seconds, source))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a grid of (H, W, L) instances, keeping results in a SQLite store.")
+    parser.add_argument('kind', help="one of %s, or 'show'" % ", ".join(SCRIPTS))
+    parser.add_argument('H', nargs='?', help="height, or range of heights like 4-8 (or the kind, with 'show')")
+    parser.add_argument('W', nargs='?', help="width, or range of widths")
+    parser.add_argument('L', nargs='?', help="longest allowed AP, or range")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="instances solved at once")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds allowed per instance")
+    parser.add_argument('--db', default=DATABASE, help="SQLite file holding the results")
+    parser.add_argument('--retry-timeouts', action='store_true', help="run again instances that timed out before")
+    parser.add_argument('--portfolio', action='store_true', help="pass --portfolio to the solving program")
+    parser.add_argument('--stats', help="append each run's per-phase record to this JSON-lines file (see runstats.py)")
+    args = parser.parse_args()
+
+    db = open_store(args.db)
+    import_existing(db)
+    if args.kind == 'show':
+        show(db, args.H or 'coloring')
+    elif args.kind not in SCRIPTS or not (args.H and args.W and args.L):
+        parser.error("give a kind and H W L")
+    else:
+        sweep(db, args.kind, span(args.H), span(args.W), span(args.L), args.workers, args.timeout,
+              (['--portfolio'] if args.portfolio else []) + (['--stats', os.path.abspath(args.stats)] if args.stats else []),
+              args.retry_timeouts)